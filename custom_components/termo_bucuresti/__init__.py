@@ -1,14 +1,35 @@
 """Termo Bucuresti Advanced Integration."""
+import asyncio
 import logging
+from typing import Optional
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, PLATFORMS
+from .const import DOMAIN, PLATFORMS, DATA_HISTORY
+from .coordinator import (
+    TermoDataUpdateCoordinator, async_get_history, get_streets, snapshot_store
+)
+from .history import export_episodes
 
 _LOGGER = logging.getLogger(__name__)
 
+REFRESH_DATA_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+})
+
+EXPORT_DATA_SCHEMA = vol.Schema({
+    vol.Optional("format", default="json"): vol.In(["json", "csv"]),
+    vol.Optional("start"): cv.datetime,
+    vol.Optional("end"): cv.datetime,
+    vol.Optional("strada"): cv.string,
+})
+
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Termo Bucuresti component."""
     hass.data.setdefault(DOMAIN, {})
@@ -18,10 +39,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Termo Bucuresti from a config entry."""
     hass.data.setdefault(DOMAIN, {})
     
+    # O singură descărcare a paginii CMTEB alimentează toate entitățile
+    history = await async_get_history(hass)
+    await _async_close_unwatched(hass)
+    coordinator = TermoDataUpdateCoordinator(hass, entry, history)
+    # Cu date salvate, entitățile pornesc imediat, iar descărcarea vine mai târziu
+    if not await coordinator.async_restore():
+        await coordinator.async_config_entry_first_refresh()
+    
     # Configurarea magazinului
     hass.data[DOMAIN][entry.entry_id] = {
         "config": entry.data,
-        "options": entry.options
+        "options": entry.options,
+        "coordinator": coordinator
     }
     
     # Configurați platforme
@@ -34,8 +64,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     entry.async_on_unload(entry.add_update_listener(_async_update_options))
     
     _LOGGER.info(
-        "Termo Bucuresti Advanced configurat cu succes pentru strada: %s",
-        entry.data.get("strada", "Necunoscută")
+        "Termo Bucuresti Advanced configurat cu succes pentru străzile: %s",
+        ", ".join(coordinator.streets)
     )
     
     return True
@@ -51,6 +81,26 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data saved for a deleted config entry."""
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    await _async_close_unwatched(hass, removed_entry_id=entry.entry_id)
+
+async def _async_close_unwatched(hass: HomeAssistant, removed_entry_id: Optional[str] = None) -> None:
+    """End the open episodes of streets no config entry watches any more."""
+    history = await async_get_history(hass)
+    # Istoricul este comun: o stradă rămâne urmărită cât timp o are măcar o intrare
+    watched = {
+        strada
+        for other in hass.config_entries.async_entries(DOMAIN)
+        if other.entry_id != removed_entry_id
+        for strada in get_streets(other)
+    }
+    closed = history.close_unwatched(watched)
+    if closed:
+        _LOGGER.info("Au fost încheiate %d întreruperi ale străzilor care nu mai sunt urmărite", closed)
+        await hass.async_add_executor_job(history.flush)
+
 async def _async_update_options(hass: HomeAssistant, entry: ConfigEntry):
     """Handle options update."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -62,14 +112,27 @@ async def _setup_services(hass: HomeAssistant):
         """Handle refresh data service call."""
         _LOGGER.info("Reîmprospătare manuală a datelor solicitată")
         
-        # Trigger update for all Termo Bucuresti entities
-        for entry_id in hass.data[DOMAIN]:
-            # This would trigger entity updates
-            pass
+        entity_ids = call.data.get(ATTR_ENTITY_ID)
+        if entity_ids:
+            # Doar intrările din spatele entităților vizate
+            registry = er.async_get(hass)
+            entry_ids = {
+                entity.config_entry_id
+                for entity in map(registry.async_get, entity_ids)
+                if entity is not None and entity.config_entry_id in hass.data[DOMAIN]
+            }
+        else:
+            entry_ids = set(hass.data[DOMAIN])
+            
+        # Apelurile simultane pentru aceeași intrare se unesc într-o singură descărcare
+        await asyncio.gather(*(
+            hass.data[DOMAIN][entry_id]["coordinator"].async_force_refresh()
+            for entry_id in entry_ids
+        ))
             
     async def async_handle_get_report(call):
         """Handle get report service call."""
-        from datetime import datetime, timedelta
+        from datetime import datetime
         
         period = call.data.get("period", "7days")
         _LOGGER.info("Generare raport pentru perioada: %s", period)
@@ -82,17 +145,22 @@ async def _setup_services(hass: HomeAssistant):
         else:  # 30days
             days = 30
             
-        report_data = {
-            "period": period,
-            "generated_at": datetime.now().isoformat(),
-            "summary": {
+        history = hass.data.get(DATA_HISTORY)
+        if history is not None:
+            summary = history.report(days)
+        else:
+            summary = {
                 "total_interruptions": 0,
                 "services_affected": [],
                 "average_duration": "N/A"
             }
+            
+        report_data = {
+            "period": period,
+            "generated_at": datetime.now().isoformat(),
+            "summary": summary
         }
         
-        # Într-o implementare reală, aceasta ar colecta date de la toate entitățile
         hass.bus.async_fire("termo_bucuresti_report_generated", report_data)
         
     async def async_handle_export_data(call):
@@ -100,12 +168,41 @@ async def _setup_services(hass: HomeAssistant):
         export_format = call.data.get("format", "json")
         _LOGGER.info("Export date în format: %s", export_format)
         
-        # Logica de export ar trebui introdusă aic
+        history = hass.data.get(DATA_HISTORY)
+        if history is None:
+            _LOGGER.warning("Nu există istoric de exportat")
+            return
+            
+        start = call.data.get("start")
+        end = call.data.get("end")
+        episodes = history.episodes(
+            start=dt_util.as_utc(start).timestamp() if start else None,
+            end=dt_util.as_utc(end).timestamp() if end else None,
+            street=call.data.get("strada"),
+        )
+        
+        # Scrierea se face rând cu rând, în afara buclei de evenimente
+        file_name = f"{DOMAIN}_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        path = hass.config.path(DOMAIN, file_name)
+        count = await hass.async_add_executor_job(
+            export_episodes, episodes, path, export_format
+        )
+        
+        _LOGGER.info("Au fost exportate %d întreruperi în %s", count, path)
+        hass.bus.async_fire("termo_bucuresti_export_completed", {
+            "path": path,
+            "format": export_format,
+            "count": count
+        })
         
     # Servicii de înregistrare
-    hass.services.async_register(DOMAIN, "refresh_data", async_handle_refresh_data)
+    hass.services.async_register(
+        DOMAIN, "refresh_data", async_handle_refresh_data, schema=REFRESH_DATA_SCHEMA
+    )
     hass.services.async_register(DOMAIN, "get_report", async_handle_get_report)
-    hass.services.async_register(DOMAIN, "export_data", async_handle_export_data)
+    hass.services.async_register(
+        DOMAIN, "export_data", async_handle_export_data, schema=EXPORT_DATA_SCHEMA
+    )
 
 async def _unload_services(hass: HomeAssistant):
     """Unload services for Termo Bucuresti."""
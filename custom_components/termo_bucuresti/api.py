@@ -0,0 +1,350 @@
+"""Shared CMTEB client for Termo Bucuresti."""
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from .const import (
+    DATA_CLIENT, MAX_CONCURRENT_PARSES, PAGE_CACHE_TTL, PAGE_CACHE_TTL_FACTOR, URL_CMTEB,
+    FETCH_RETRIES, FETCH_BACKOFF_BASE, FETCH_BACKOFF_MAX,
+    BREAKER_THRESHOLD, BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN, STALE_MAX_AGE
+)
+from .parser import CONTENT_END_MARKER, PageIndex, PageParser
+from .telemetry import FetchStats, PipelineTelemetry
+
+import asyncio
+import codecs
+import hashlib
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Pagina este citită în bucăți de această dimensiune
+READ_CHUNK_SIZE = 64 * 1024
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+class CmtebError(Exception):
+    """Raised when the CMTEB page cannot be downloaded."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitBreaker:
+    """Stop contacting CMTEB for a while after repeated failures.
+
+    After ``threshold`` consecutive failed fetches the breaker opens for
+    ``cooldown`` seconds, doubling on every failed trial up to
+    ``max_cooldown``. When the cooldown expires one trial fetch is let
+    through; a success closes the breaker again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_THRESHOLD,
+        cooldown: float = BREAKER_COOLDOWN,
+        max_cooldown: float = BREAKER_MAX_COOLDOWN,
+    ):
+        self._threshold = threshold
+        self._base_cooldown = cooldown
+        self._max_cooldown = max_cooldown
+        self._cooldown = cooldown
+        self._failures = 0
+        self._open_until: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Return whether requests are currently blocked."""
+        return self._open_until is not None and time.monotonic() < self._open_until
+
+    def allow(self) -> bool:
+        """Return whether a fetch may be attempted now."""
+        return not self.is_open
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful fetch."""
+        self._failures = 0
+        self._cooldown = self._base_cooldown
+        self._open_until = None
+
+    def record_failure(self) -> None:
+        """Count a failed fetch and open the breaker when needed."""
+        self._failures += 1
+        if self._open_until is not None:
+            # Încercarea de după pauză a eșuat: pauza următoare e mai lungă
+            self._cooldown = min(self._cooldown * 2, self._max_cooldown)
+        elif self._failures < self._threshold:
+            return
+        self._open_until = time.monotonic() + self._cooldown
+        _LOGGER.warning(
+            "CMTEB indisponibil după %d încercări eșuate, pauză %d secunde",
+            self._failures, self._cooldown
+        )
+
+
+class CmtebClient:
+    """Process-wide CMTEB client with single-flight fetching and a short page cache.
+
+    Every config entry goes through the same client, so concurrent polls for
+    the same URL await a single download and parse, and later polls inside
+    the cache window reuse the parsed page. Downloads are conditional
+    (ETag / Last-Modified); without validators the body is read up to the
+    end of the interruptions section and hashed before parsing, and an
+    unchanged hash reuses the previous index without parsing. An unchanged
+    page therefore always yields the same ``PageIndex`` object.
+
+    Parsing runs in the executor, with at most ``MAX_CONCURRENT_PARSES`` parse
+    jobs at a time; the event loop only performs I/O.
+
+    Failed downloads are retried with bounded exponential backoff, and a
+    circuit breaker shared by all entries stops requests while CMTEB is down.
+    Meanwhile the last good page keeps being served for up to
+    ``STALE_MAX_AGE`` seconds, flagged through ``is_stale``. Every download
+    is measured into ``telemetry`` and attached to its index as ``stats``.
+    Without ``hass`` (e.g. against a local stub server in the tests) parsing
+    uses the loop's default executor.
+    """
+
+    def __init__(
+        self,
+        hass: Optional[HomeAssistant],
+        session: aiohttp.ClientSession,
+        cache_ttl: float = PAGE_CACHE_TTL,
+        breaker: Optional[CircuitBreaker] = None,
+        telemetry: Optional[PipelineTelemetry] = None,
+    ):
+        self._hass = hass
+        self._session = session
+        self._breaker = breaker or CircuitBreaker()
+        self.telemetry = telemetry or PipelineTelemetry()
+        self._stale: Dict[str, bool] = {}
+        self._parse_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PARSES)
+        self._cache_ttl = cache_ttl
+        self._poll_intervals: Dict[str, float] = {}
+        self._cache: Dict[str, Tuple[float, PageIndex]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._validators: Dict[str, Dict[str, str]] = {}
+
+    async def async_get_index(self, url: str = URL_CMTEB, force: bool = False) -> PageIndex:
+        """Return the parsed page, sharing in-flight and recent downloads."""
+        if not force:
+            cached = self._cache.get(url)
+            if cached and time.monotonic() - cached[0] < self.cache_ttl:
+                return cached[1]
+
+        future = self._inflight.get(url)
+        if future is None:
+            future = asyncio.ensure_future(self._async_fetch(url))
+            self._inflight[url] = future
+            future.add_done_callback(lambda _: self._inflight.pop(url, None))
+        else:
+            _LOGGER.debug("Se așteaptă descărcarea deja în curs pentru %s", url)
+
+        # Un apelant anulat nu trebuie să anuleze descărcarea pentru ceilalți
+        return await asyncio.shield(future)
+
+    @property
+    def cache_ttl(self) -> float:
+        """Return how long a downloaded page is shared with other entries.
+
+        Entries poll on their own jittered schedules, so their phases drift
+        apart; keeping the page for almost the shortest polling interval
+        means about one download per interval, whatever the entry count.
+        """
+        if not self._poll_intervals:
+            return self._cache_ttl
+        return max(self._cache_ttl, min(self._poll_intervals.values()) * PAGE_CACHE_TTL_FACTOR)
+
+    def set_poll_interval(self, key: str, seconds: float) -> None:
+        """Record the current polling interval of an entry."""
+        self._poll_intervals[key] = seconds
+
+    def forget_poll_interval(self, key: str) -> None:
+        """Stop counting an unloaded entry."""
+        self._poll_intervals.pop(key, None)
+
+    def is_stale(self, url: str = URL_CMTEB) -> bool:
+        """Return whether the last result for ``url`` was served from an old page."""
+        return self._stale.get(url, False)
+
+    async def _async_fetch(self, url: str) -> PageIndex:
+        """Fetch the page, falling back to the last good one on failure."""
+        if not self._breaker.allow():
+            return self._serve_stale(url, CmtebError("CMTEB este în pauză după erori repetate"))
+
+        try:
+            index = await self._async_fetch_with_retry(url)
+        except CmtebError as e:
+            self._breaker.record_failure()
+            return self._serve_stale(url, e)
+
+        self._breaker.record_success()
+        self._stale[url] = False
+        return index
+
+    def _serve_stale(self, url: str, error: CmtebError) -> PageIndex:
+        """Return the last good page if it is recent enough, otherwise raise ``error``."""
+        cached = self._cache.get(url)
+        if cached is None or time.time() - cached[1].fetched_at > STALE_MAX_AGE:
+            raise error
+        _LOGGER.warning("Se folosesc datele anterioare de la CMTEB: %s", error)
+        self._stale[url] = True
+        return cached[1]
+
+    async def _async_fetch_with_retry(self, url: str) -> PageIndex:
+        """Download the page, retrying transient errors with backoff."""
+        for attempt in range(FETCH_RETRIES):
+            try:
+                return await self._async_fetch_once(url)
+            except CmtebError as e:
+                if not e.retryable or attempt == FETCH_RETRIES - 1:
+                    raise
+                delay = min(FETCH_BACKOFF_MAX, FETCH_BACKOFF_BASE * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                _LOGGER.debug("Reîncercare în %.1f secunde după eroarea: %s", delay, e)
+                await asyncio.sleep(delay)
+        raise CmtebError("Nicio încercare de descărcare")
+
+    async def _async_fetch_once(self, url: str) -> PageIndex:
+        """Download and parse the page, then store it in the cache."""
+        previous = self._cache.get(url)
+        headers = dict(HEADERS)
+        if previous:
+            validators = self._validators.get(url, {})
+            if 'etag' in validators:
+                headers['If-None-Match'] = validators['etag']
+            if 'last_modified' in validators:
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        start = time.perf_counter()
+        try:
+            async with self._session.get(url, headers=headers, timeout=30) as response:
+                if response.status == 304 and previous:
+                    _LOGGER.debug("Pagina CMTEB nu s-a modificat (304)")
+                    stats = FetchStats(
+                        status=304,
+                        fetch_ms=(time.perf_counter() - start) * 1000,
+                        bytes_received=0,
+                        parse_ms=0.0,
+                        fragment_count=previous[1].fragment_count,
+                    )
+                    return self._store(url, previous[1], stats)
+                if response.status != 200:
+                    # Erorile de client nu se rezolvă prin reîncercare
+                    raise CmtebError(
+                        f"CMTEB a răspuns cu status {response.status}",
+                        retryable=response.status >= 500 or response.status == 429,
+                    )
+                self._validators[url] = {
+                    key: value for key, value in (
+                        ('etag', response.headers.get('ETag')),
+                        ('last_modified', response.headers.get('Last-Modified')),
+                    ) if value
+                }
+                chunks, digest, bytes_received = await self._async_read_body(response)
+                charset = response.charset or 'utf-8'
+        except CmtebError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise CmtebError(f"Eroare la descărcarea paginii: {e}") from e
+
+        # Serverul nu suportă cereri condiționate: conținutul neschimbat nu se mai parsează
+        if previous and previous[1].content_hash == digest:
+            _LOGGER.debug("Pagina CMTEB are același conținut, se păstrează indexul anterior")
+            index, parse_ms = previous[1], 0.0
+        else:
+            index, parse_ms = await self.async_run_parse_job(_parse_chunks, chunks, charset)
+            index.content_hash = digest
+
+        stats = FetchStats(
+            status=200,
+            fetch_ms=(time.perf_counter() - start) * 1000 - parse_ms,
+            bytes_received=bytes_received,
+            parse_ms=parse_ms,
+            fragment_count=index.fragment_count,
+        )
+        return self._store(url, index, stats)
+
+    @staticmethod
+    async def _async_read_body(
+        response: aiohttp.ClientResponse
+    ) -> Tuple[List[bytes], str, int]:
+        """Read the body up to the end of the interruptions section.
+
+        Returns the chunks kept, the SHA-256 of their bytes and the number of
+        bytes received. The hash covers exactly the bytes before the end
+        marker, so it does not depend on how the response was chunked.
+        """
+        marker = CONTENT_END_MARKER.encode('ascii')
+        hasher = hashlib.sha256()
+        chunks: List[bytes] = []
+        bytes_received = 0
+        pending = b''
+
+        async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+            bytes_received += len(chunk)
+            data = pending + chunk
+            end = data.lower().find(marker)
+            if end != -1:
+                # Secțiunea de întreruperi s-a încheiat, restul paginii nu mai contează
+                pending = b''
+                data = data[:end]
+                hasher.update(data)
+                chunks.append(data)
+                break
+            # Ultimii octeți pot fi începutul markerului, îi păstrăm pentru bucata următoare
+            cut = max(0, len(data) - len(marker) + 1)
+            pending = data[cut:]
+            hasher.update(data[:cut])
+            chunks.append(data[:cut])
+
+        hasher.update(pending)
+        chunks.append(pending)
+        return chunks, hasher.hexdigest(), bytes_received
+
+    async def async_run_parse_job(self, target, *args):
+        """Run a CPU-bound parse or matching step in the executor.
+
+        Page parsing and the per-entry matching share the same cap, so many
+        entries refreshing together never occupy more than
+        ``MAX_CONCURRENT_PARSES`` executor threads.
+        """
+        async with self._parse_semaphore:
+            if self._hass is None:
+                return await asyncio.get_running_loop().run_in_executor(None, target, *args)
+            return await self._hass.async_add_executor_job(target, *args)
+
+    def _store(self, url: str, index: PageIndex, stats: FetchStats) -> PageIndex:
+        """Cache ``index`` as the current version of ``url``."""
+        self.telemetry.record_fetch(stats)
+        index.stats = stats
+        index.fetched_at = time.time()
+        self._cache[url] = (time.monotonic(), index)
+        return index
+
+
+def _parse_chunks(chunks: List[bytes], charset: str) -> Tuple[PageIndex, float]:
+    """Feed the body chunks to the incremental parser and time it. Blocking."""
+    start = time.perf_counter()
+    parser = PageParser()
+    decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+    parser.feed(decoder.decode(b'', True))
+    index = parser.close()
+    return index, (time.perf_counter() - start) * 1000
+
+
+def async_get_client(hass: HomeAssistant) -> CmtebClient:
+    """Return the client shared by all config entries."""
+    client = hass.data.get(DATA_CLIENT)
+    if client is None:
+        client = hass.data[DATA_CLIENT] = CmtebClient(hass, async_get_clientsession(hass))
+    return client
@@ -1,10 +1,13 @@
 """Config flow for Termo Bucuresti."""
 from homeassistant import config_entries
+import re
 import voluptuous as vol
 from .const import (
-    DOMAIN, CONF_STRADA, CONF_PUNCT_TERMIC, CONF_SECTOR, 
-    CONF_UPDATE_INTERVAL, PUNCTE_TERMICE, SECTORI, DEFAULT_UPDATE_INTERVAL
+    DOMAIN, CONF_STRADA, CONF_STRAZI, CONF_PUNCT_TERMIC, CONF_SECTOR, 
+    CONF_UPDATE_INTERVAL, PUNCTE_TERMICE, SECTORI, DEFAULT_UPDATE_INTERVAL,
+    MIN_UPDATE_INTERVAL, MAX_UPDATE_INTERVAL
 )
+from .normalize import normalize_street
 
 class TermoBucurestiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Termo Bucuresti."""
@@ -13,19 +16,35 @@ class TermoBucurestiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
+        errors = {}
+
         if user_input is not None:
-            return self.async_create_entry(
-                title=f"Termo - {user_input[CONF_STRADA]}",
-                data=user_input
-            )
+            # Mai multe străzi pot fi separate prin virgulă, punct și virgulă sau rând nou.
+            # Variantele aceleiași străzi ("Str. Unirii", "str unirii") se păstrează o dată,
+            # altfel ar avea aceleași entități și aceleași potriviri
+            strazi = {}
+            for strada in re.split(r'[,;\n]', user_input[CONF_STRADA]):
+                strada = strada.strip()
+                if normalize_street(strada):
+                    strazi.setdefault(normalize_street(strada), strada)
+            strazi = list(strazi.values())
+            if strazi:
+                title = f"Termo - {strazi[0]}"
+                if len(strazi) > 1:
+                    title += f" (+{len(strazi) - 1})"
+                return self.async_create_entry(
+                    title=title,
+                    data={**user_input, CONF_STRADA: strazi[0], CONF_STRAZI: strazi}
+                )
+            errors[CONF_STRADA] = "invalid_street"
 
         schema = vol.Schema({
             vol.Required(CONF_STRADA): str,
             vol.Required(CONF_PUNCT_TERMIC, default="toate"): vol.In(PUNCTE_TERMICE),
             vol.Required(CONF_SECTOR, default="toate"): vol.In(SECTORI),
             vol.Required(CONF_UPDATE_INTERVAL, default=DEFAULT_UPDATE_INTERVAL): vol.All(
-                vol.Coerce(int), vol.Range(min=5, max=120)
+                vol.Coerce(int), vol.Range(min=MIN_UPDATE_INTERVAL, max=MAX_UPDATE_INTERVAL)
             ),
         })
 
-        return self.async_show_form(step_id="user", data_schema=schema)
+        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
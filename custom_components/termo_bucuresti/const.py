@@ -6,6 +6,7 @@ PLATFORMS = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
 # Chei de configurare
 CONF_STRADA = "strada"
+CONF_STRAZI = "strazi"
 CONF_PUNCT_TERMIC = "punct_termic"
 CONF_SECTOR = "sector"
 CONF_UPDATE_INTERVAL = "update_interval"
@@ -14,6 +15,8 @@ CONF_DEBUG_MODE = "debug_mode"
 
 # Valori implicite
 DEFAULT_UPDATE_INTERVAL = 15
+MIN_UPDATE_INTERVAL = 5
+MAX_UPDATE_INTERVAL = 120
 DEFAULT_NOTIFICARI = True
 DEFAULT_DEBUG_MODE = False
 
@@ -38,10 +41,60 @@ SECTORI = {
     "sector6": "Sector 6"
 }
 
+# Planificare adaptivă: interogare mai deasă cât timp există întreruperi
+# și mai rară după o perioadă lungă fără întreruperi
+ACTIVE_INTERVAL_FACTOR = 0.5
+QUIET_BACKOFF_AFTER = 6 * 60 * 60
+QUIET_BACKOFF_MAX_FACTOR = 4
+UPDATE_INTERVAL_JITTER = 0.1
+
+# Date partajate între intrări
+DATA_CLIENT = f"{DOMAIN}_client"
+DATA_HISTORY = f"{DOMAIN}_history"
+
+# Durata minimă de viață a paginii CMTEB în cache (secunde); în rest pagina
+# rămâne în cache cât cel mai scurt interval de interogare, minus variația aleatorie
+PAGE_CACHE_TTL = 60
+PAGE_CACHE_TTL_FACTOR = 1 - UPDATE_INTERVAL_JITTER
+
+# Reîncercări la descărcare, cu pauză exponențială (secunde)
+FETCH_RETRIES = 3
+FETCH_BACKOFF_BASE = 2
+FETCH_BACKOFF_MAX = 30
+
+# Întrerupător comun tuturor intrărilor: pauză după erori consecutive (secunde)
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 5 * 60
+BREAKER_MAX_COOLDOWN = 60 * 60
+
+# Cât timp se mai servesc ultimele date bune când CMTEB nu răspunde (secunde)
+STALE_MAX_AGE = 6 * 60 * 60
+
+# Ultimele date ale fiecărei intrări, restaurate la pornire
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_STORAGE_KEY = f"{DOMAIN}.snapshot"
+SNAPSHOT_SAVE_DELAY = 10
+
+# Prima descărcare după o pornire cu date restaurate este eșalonată (secunde)
+STARTUP_REFRESH_DELAY_MIN = 30
+STARTUP_REFRESH_DELAY_MAX = 180
+
+# Numărul maxim de parsări rulate simultan în executor
+MAX_CONCURRENT_PARSES = 2
+
 # URL-uri
 URL_CMTEB = "https://www.cmteb.ro/functionare_sistem_termoficare.php"
 URL_BASE = "https://www.cmteb.ro"
 
+# Evenimente emise la schimbarea întreruperilor
+EVENT_INTERRUPTION_STARTED = f"{DOMAIN}_interruption_started"
+EVENT_INTERRUPTION_UPDATED = f"{DOMAIN}_interruption_updated"
+EVENT_INTERRUPTION_RESOLVED = f"{DOMAIN}_interruption_resolved"
+
+# Semnal trimis după fiecare actualizare, chiar dacă datele nu s-au schimbat;
+# fiecare intrare are semnalul ei, cu entry_id adăugat la sfârșit
+SIGNAL_TELEMETRY_UPDATED = f"{DOMAIN}_telemetry_updated"
+
 # Atribute
 ATTR_CAUZA = "cauza"
 ATTR_DESCRIERE = "descriere"
@@ -53,6 +106,12 @@ ATTR_PUNCT_TERMIC = "punct_termic"
 ATTR_SECTOR = "sector"
 ATTR_ULTIMA_ACTUALIZARE = "ultima_actualizare"
 ATTR_NUMAR_INTRERUPERI = "numar_intreruperi"
+ATTR_ULTIMA_VERIFICARE = "ultima_verificare"
+ATTR_DATE_ACTUALIZATE_LA = "date_actualizate_la"
+ATTR_DATE_INVECHITE = "date_invechite"
+
+# Atribute care se schimbă la fiecare interogare și nu justifică singure o scriere a stării
+VOLATILE_ATTRIBUTES = (ATTR_ULTIMA_ACTUALIZARE, ATTR_ULTIMA_VERIFICARE)
 
 # Tipuri de servicii
 SERVICIU_APA_CALDA = "apă caldă"
@@ -0,0 +1,370 @@
+"""Data update coordinator for Termo Bucuresti."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from .api import CmtebError, async_get_client
+from .const import (
+    DOMAIN, CONF_STRADA, CONF_STRAZI, CONF_SECTOR, CONF_PUNCT_TERMIC,
+    CONF_UPDATE_INTERVAL, URL_CMTEB, DATA_HISTORY,
+    EVENT_INTERRUPTION_STARTED, EVENT_INTERRUPTION_UPDATED, EVENT_INTERRUPTION_RESOLVED,
+    DEFAULT_UPDATE_INTERVAL, MIN_UPDATE_INTERVAL, MAX_UPDATE_INTERVAL,
+    ACTIVE_INTERVAL_FACTOR, QUIET_BACKOFF_AFTER, QUIET_BACKOFF_MAX_FACTOR,
+    UPDATE_INTERVAL_JITTER, SNAPSHOT_STORAGE_VERSION, SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_SAVE_DELAY, STARTUP_REFRESH_DELAY_MIN, STARTUP_REFRESH_DELAY_MAX,
+    STALE_MAX_AGE, SIGNAL_TELEMETRY_UPDATED
+)
+from .diff import SnapshotDiff, diff_snapshots
+from .history import HISTORY_FILE, HistoryStore
+from .matcher import TrieMatcher
+from .models import (
+    Interruption, Snapshot, StreetSnapshot, interruption_ids,
+    snapshot_from_dict, snapshot_to_dict
+)
+from .normalize import normalize_street
+from .parser import PageIndex
+from .telemetry import (
+    METRIC_MATCHES, METRIC_REFRESH_MS, TRACE_BUFFER_SIZE, TRACE_ERROR, TRACE_OK,
+    TRACE_STALE, PipelineTelemetry, RefreshTrace, make_trace
+)
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+_HISTORY_LOCK = asyncio.Lock()
+
+
+def get_streets(entry: ConfigEntry) -> List[str]:
+    """Return the streets watched by an entry, in configured order."""
+    return entry.data.get(CONF_STRAZI) or [entry.data[CONF_STRADA]]
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Return the store holding the last snapshot of an entry."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{SNAPSHOT_STORAGE_KEY}.{entry_id}")
+
+
+async def async_get_history(hass: HomeAssistant) -> HistoryStore:
+    """Return the interruption history shared by all config entries."""
+    async with _HISTORY_LOCK:
+        history = hass.data.get(DATA_HISTORY)
+        if history is None:
+            history = HistoryStore(hass.config.path(STORAGE_DIR, HISTORY_FILE))
+            await hass.async_add_executor_job(history.load)
+            hass.data[DATA_HISTORY] = history
+        return history
+
+
+class TermoDataUpdateCoordinator(DataUpdateCoordinator):
+    """Fetch and parse the CMTEB page once for all entities of an entry."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, history: HistoryStore):
+        self._base_interval = entry.options.get(
+            CONF_UPDATE_INTERVAL,
+            entry.data.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL)
+        )
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{entry.entry_id}",
+            update_interval=self._jittered(self._base_interval),
+            always_update=False,
+        )
+        self._entry = entry
+        self.streets = get_streets(entry)
+        self._street_matcher = TrieMatcher(normalize_street(strada) for strada in self.streets)
+        self._history = history
+        self._normal_since = time.monotonic()
+        self._force_fetch = False
+        self._forced_refresh = None
+        self._client = async_get_client(hass)
+        self._client.set_poll_interval(entry.entry_id, self._base_interval * 60)
+        entry.async_on_unload(lambda: self._client.forget_poll_interval(entry.entry_id))
+        self.last_update = None
+        self._content_hash = None
+        self.stale = False
+        self.data_fetched_at: Optional[datetime] = None
+        self._store = snapshot_store(hass, entry.entry_id)
+        self.telemetry = PipelineTelemetry()
+        self._last_stats = None
+        self.traces: Deque[RefreshTrace] = deque(maxlen=TRACE_BUFFER_SIZE)
+        self._matched_offsets: Tuple[int, ...] = ()
+        # Doar entitățile acestei intrări sunt anunțate după o actualizare
+        self.telemetry_signal = f"{SIGNAL_TELEMETRY_UPDATED}_{entry.entry_id}"
+
+    def statistics(self, street: str) -> Dict[str, Any]:
+        """Return the rolling outage statistics of ``street``."""
+        return self._history.statistics(street)
+
+    @property
+    def shared_telemetry(self) -> PipelineTelemetry:
+        """Return the telemetry aggregated over all entries."""
+        return self._client.telemetry
+
+    async def async_restore(self) -> bool:
+        """Load the snapshot saved before the last restart.
+
+        On success the restored data is served right away, marked as stale,
+        and the first live fetch is delayed by a random amount so entries do
+        not all hit CMTEB while Home Assistant starts.
+        """
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+        try:
+            snapshot = snapshot_from_dict(stored['snapshot'])
+            fetched_at = stored.get('fetched_at')
+            self.data_fetched_at = datetime.fromisoformat(fetched_at) if fetched_at else None
+        except (KeyError, TypeError, ValueError) as e:
+            _LOGGER.warning("Datele salvate pentru %s nu pot fi citite: %s", self.name, e)
+            return False
+
+        # Străzile scoase din configurare nu mai au entități
+        self.data = Snapshot(
+            strazi={s: snapshot.strazi[s] for s in self.streets if s in snapshot.strazi},
+            ultima_actualizare=snapshot.ultima_actualizare,
+        )
+        self.last_update = snapshot.ultima_actualizare
+        self.stale = True
+        self.update_interval = timedelta(
+            seconds=random.uniform(STARTUP_REFRESH_DELAY_MIN, STARTUP_REFRESH_DELAY_MAX)
+        )
+        return True
+
+    async def _async_update_data(self) -> Snapshot:
+        """Download and parse the CMTEB page."""
+        start = time.perf_counter()
+        try:
+            force, self._force_fetch = self._force_fetch, False
+            index = await self._client.async_get_index(URL_CMTEB, force=force)
+        except CmtebError as e:
+            return self._handle_fetch_error(e, start)
+
+        # Descărcarea este comună intrărilor, dar fiecare o înregistrează o singură dată
+        new_download = index.stats is not None and index.stats is not self._last_stats
+        if new_download:
+            self._last_stats = index.stats
+            self.telemetry.record_fetch(index.stats)
+
+        self.last_update = dt_util.now()
+        stale_changed = self._client.is_stale(URL_CMTEB) != self.stale
+        self.stale = self._client.is_stale(URL_CMTEB)
+        self.data_fetched_at = dt_util.as_local(dt_util.utc_from_timestamp(index.fetched_at))
+
+        # Pagina nu s-a schimbat: păstrăm aceleași date ca entitățile să nu fie rescrise
+        if self.data is not None and index.content_hash == self._content_hash:
+            data = self.data
+        else:
+            # Extragerea câmpurilor și căutarea străzilor intră sub aceeași limită ca parsarea
+            data, self._matched_offsets = await self._client.async_run_parse_job(
+                self._build_entry_data, index, self.data
+            )
+            self._content_hash = index.content_hash
+            diff = diff_snapshots(self.data, data)
+            if self.data is None:
+                # La pornire nu anunțăm din nou întreruperile deja deschise în istoric
+                diff = SnapshotDiff(
+                    started=tuple(i for i in diff.started if not self._history.is_open(i.id))
+                )
+            self._fire_events(diff)
+
+            now = dt_util.utcnow().timestamp()
+            for strada, street_data in data.strazi.items():
+                self._history.sync_street(strada, street_data.interruptions, now)
+            await self.hass.async_add_executor_job(self._history.flush)
+            self._store.async_delay_save(lambda: self._stored_data(data), SNAPSHOT_SAVE_DELAY)
+
+        self.update_interval = self._next_interval(data.total_gasite > 0)
+        self._record_refresh(data, start, index, new_download)
+        if stale_changed and data is self.data:
+            # Datele sunt aceleași, dar entitățile trebuie să arate dacă sunt învechite
+            self.async_update_listeners()
+        return data
+
+    def _handle_fetch_error(self, error: CmtebError, start: float) -> Snapshot:
+        """Keep serving the last good data while it is recent enough, otherwise fail.
+
+        After a restart the client has no page of its own to fall back on, so
+        the snapshot restored from storage is served as stale instead, up to
+        ``STALE_MAX_AGE``.
+        """
+        # Intervalul aleator de pornire nu trebuie să rămână în vigoare după un eșec
+        self.update_interval = self._next_interval(
+            self.data is not None and self.data.total_gasite > 0
+        )
+        fresh_enough = self.data_fetched_at is not None and (
+            dt_util.utcnow() - self.data_fetched_at
+        ).total_seconds() <= STALE_MAX_AGE
+        refresh_ms = (time.perf_counter() - start) * 1000
+        if self.data is None or not fresh_enough:
+            self.traces.append(make_trace(time.time(), TRACE_ERROR, refresh_ms, error=str(error)))
+            raise UpdateFailed(str(error)) from error
+
+        _LOGGER.warning("Se folosesc datele salvate pentru %s: %s", self.name, error)
+        self.traces.append(make_trace(time.time(), TRACE_STALE, refresh_ms, error=str(error)))
+        if not self.stale:
+            self.stale = True
+            # Datele sunt aceleași, dar entitățile trebuie să arate că sunt învechite
+            self.async_update_listeners()
+        return self.data
+
+    def _record_refresh(
+        self, data: Snapshot, start: float, index: PageIndex, new_download: bool
+    ) -> None:
+        """Add the samples and the trace of this refresh and notify the diagnostic sensors."""
+        refresh_ms = (time.perf_counter() - start) * 1000
+        for telemetry in (self.telemetry, self.shared_telemetry):
+            telemetry.record(METRIC_MATCHES, data.total_gasite)
+            telemetry.record(METRIC_REFRESH_MS, refresh_ms)
+        self.traces.append(make_trace(
+            time.time(),
+            TRACE_STALE if self.stale else TRACE_OK,
+            refresh_ms,
+            stats=index.stats,
+            new_download=new_download,
+            content_hash=index.content_hash,
+            matched_offsets=self._matched_offsets,
+        ))
+
+        stats = self._last_stats
+        if stats is not None:
+            _LOGGER.debug(
+                "%s: descărcare %.0f ms (%d octeți, status %d), parsare %.0f ms "
+                "(%d fragmente), %d potriviri, actualizare %.0f ms",
+                self.name, stats.fetch_ms, stats.bytes_received, stats.status,
+                stats.parse_ms, stats.fragment_count, data.total_gasite, refresh_ms
+            )
+        async_dispatcher_send(self.hass, self.telemetry_signal)
+
+    def _stored_data(self, data: Snapshot) -> Dict[str, Any]:
+        """Return what is saved for the next restart."""
+        return {
+            'snapshot': snapshot_to_dict(data),
+            'fetched_at': self.data_fetched_at.isoformat() if self.data_fetched_at else None,
+        }
+
+    def _next_interval(self, active: bool) -> timedelta:
+        """Return the polling interval that follows the current state."""
+        now = time.monotonic()
+        minutes = self._base_interval
+
+        if active:
+            self._normal_since = None
+            minutes *= ACTIVE_INTERVAL_FACTOR
+        else:
+            if self._normal_since is None:
+                self._normal_since = now
+            # Dublăm intervalul pentru fiecare perioadă liniștită, până la limită
+            quiet_periods = int((now - self._normal_since) // QUIET_BACKOFF_AFTER)
+            minutes *= min(2 ** quiet_periods, QUIET_BACKOFF_MAX_FACTOR)
+
+        minutes = max(MIN_UPDATE_INTERVAL, min(MAX_UPDATE_INTERVAL, minutes))
+        self._client.set_poll_interval(self._entry.entry_id, minutes * 60)
+        return self._jittered(minutes)
+
+    @staticmethod
+    def _jittered(minutes: float) -> timedelta:
+        """Spread polls so entries do not fire in the same second."""
+        jitter = random.uniform(-UPDATE_INTERVAL_JITTER, UPDATE_INTERVAL_JITTER)
+        return timedelta(minutes=minutes * (1 + jitter))
+
+    async def async_force_refresh(self) -> None:
+        """Fetch fresh data now, bypassing the page cache.
+
+        Calls made while a forced refresh is running wait for that refresh
+        instead of starting another one.
+        """
+        if self._forced_refresh is None:
+            self._forced_refresh = self.hass.async_create_task(self._async_forced_refresh())
+        await asyncio.shield(self._forced_refresh)
+
+    async def _async_forced_refresh(self) -> None:
+        """Run one forced refresh."""
+        try:
+            self._force_fetch = True
+            await self.async_refresh()
+        finally:
+            self._forced_refresh = None
+
+    def _build_entry_data(
+        self, index: PageIndex, previous: Optional[Snapshot]
+    ) -> Tuple[Snapshot, Tuple[int, ...]]:
+        """Select the interruptions of every watched street from the shared page index.
+
+        Also returns the page offsets of the matched fragments, for the traces.
+        """
+        sector = self._entry.data.get(CONF_SECTOR)
+        punct_termic = self._entry.data.get(CONF_PUNCT_TERMIC)
+        now = dt_util.now()
+        known = previous.by_id() if previous is not None else {}
+
+        # Toate străzile intrării sunt căutate într-o singură trecere prin pagină
+        matches = index.lookup_many(self._street_matcher, sector, punct_termic)
+
+        strazi = {}
+        for strada in self.streets:
+            interruptions = []
+            records = matches.get(normalize_street(strada), ())
+            ids = interruption_ids(strada, ((r['serviciu'], r['cauza']) for r in records))
+            for ep_id, record in zip(ids, records):
+                detectat_la = self._detected_at(known.get(ep_id), ep_id, now)
+                interruptions.append(Interruption(
+                    id=ep_id,
+                    strada=strada,
+                    serviciu=record['serviciu'],
+                    cauza=record['cauza'],
+                    descriere=record['descriere'],
+                    data_estimata=record['data_estimata'],
+                    ora_estimata=record['ora_estimata'],
+                    detectat_la=detectat_la,
+                ))
+            strazi[strada] = StreetSnapshot(strada, tuple(interruptions))
+
+        offsets = tuple(sorted({
+            record['offset'] for records in matches.values() for record in records
+        }))
+        return Snapshot(strazi=strazi, ultima_actualizare=now), offsets
+
+    def _detected_at(
+        self, previous: Optional[Interruption], ep_id: str, now: datetime
+    ) -> datetime:
+        """Return when an interruption was first seen, keeping it stable across polls."""
+        if previous is not None:
+            return previous.detectat_la
+        # După o repornire, momentul vine din episodul deschis în istoric
+        started = self._history.started_at(ep_id)
+        if started is not None:
+            return dt_util.as_local(dt_util.utc_from_timestamp(started))
+        return now
+
+    def _fire_events(self, diff: SnapshotDiff) -> None:
+        """Announce the interruptions that started, changed or ended."""
+        for event_type, interruptions in (
+            (EVENT_INTERRUPTION_STARTED, diff.started),
+            (EVENT_INTERRUPTION_UPDATED, diff.updated),
+            (EVENT_INTERRUPTION_RESOLVED, diff.resolved),
+        ):
+            for interruption in interruptions:
+                self.hass.bus.async_fire(event_type, self._event_data(interruption))
+
+    def _event_data(self, interruption: Interruption) -> Dict[str, Any]:
+        """Return the payload of an interruption event."""
+        return {
+            'entry_id': self._entry.entry_id,
+            'id': interruption.id,
+            'strada': interruption.strada,
+            'serviciu': str(interruption.serviciu),
+            'cauza': interruption.cauza,
+            'data_estimata': interruption.data_estimata,
+            'ora_estimata': interruption.ora_estimata,
+            'detectat_la': interruption.detectat_la.isoformat(),
+        }
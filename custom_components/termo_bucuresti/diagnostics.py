@@ -1,64 +1,74 @@
 """Diagnostics support for Termo Bucuresti."""
+from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import __version__ as HA_VERSION
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceEntry
+from homeassistant.loader import async_get_integration
+from dataclasses import asdict
 from typing import Any
-import json
 
-from .const import DOMAIN
+from .const import DOMAIN, CONF_STRADA, CONF_STRAZI
+
+# Numele străzilor identifică locuința utilizatorului
+TO_REDACT = {CONF_STRADA, CONF_STRAZI, "title"}
 
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, config_entry: ConfigEntry
 ) -> dict[str, Any]:
-    """Return diagnostics for a config entry."""
+    """Return diagnostics for a config entry.
+
+    The output is built from the coordinator's bounded trace buffer and
+    telemetry summaries, so its size does not depend on the page or on the
+    number of interruptions.
+    """
+    integration = await async_get_integration(hass, DOMAIN)
     data = {
-        "config_entry": {
+        "config_entry": async_redact_data({
             "title": config_entry.title,
             "data": dict(config_entry.data),
             "options": dict(config_entry.options),
-            "unique_id": config_entry.unique_id,
             "entry_id": config_entry.entry_id,
-        },
-        "integration_data": {},
+        }, TO_REDACT),
+        "coordinator": None,
+        "telemetry": None,
+        "traces": [],
         "entities": [],
         "system_info": {
-            "homeassistant_version": str(hass.config.version),
-            "integration_version": "2.0.0"
+            "homeassistant_version": HA_VERSION,
+            "integration_version": str(integration.version) if integration.version else None,
         }
     }
-    
-    # Get integration data if available
-    if DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]:
-        integration_data = hass.data[DOMAIN][config_entry.entry_id]
-        data["integration_data"] = integration_data
-    
-    # Get entities information
-    entity_registry = hass.helpers.entity_registry.async_get(hass)
-    termo_entities = [
-        entity for entity in entity_registry.entities.values()
-        if entity.config_entry_id == config_entry.entry_id
-    ]
-    
-    for entity in termo_entities:
+
+    entry_data = hass.data.get(DOMAIN, {}).get(config_entry.entry_id)
+    coordinator = entry_data.get("coordinator") if entry_data else None
+    if coordinator is not None:
+        data["coordinator"] = {
+            "last_update_success": coordinator.last_update_success,
+            "last_update": coordinator.last_update.isoformat() if coordinator.last_update else None,
+            "update_interval": coordinator.update_interval.total_seconds()
+            if coordinator.update_interval else None,
+            "stale": coordinator.stale,
+            "streets": len(coordinator.streets),
+            "interruptions": coordinator.data.total_gasite if coordinator.data else None,
+        }
+        data["telemetry"] = {
+            "entry": coordinator.telemetry.summaries(),
+            "integration": coordinator.shared_telemetry.summaries(),
+        }
+        data["traces"] = [asdict(trace) for trace in coordinator.traces]
+
+    # Doar platforma și starea: entity_id conține numele străzii, iar atributele sunt prea mari
+    registry = er.async_get(hass)
+    for entity in er.async_entries_for_config_entry(registry, config_entry.entry_id):
         state = hass.states.get(entity.entity_id)
-        entity_data = {
-            "entity_id": entity.entity_id,
-            "name": entity.name,
-            "unique_id": entity.unique_id,
+        data["entities"].append({
+            "domain": entity.domain,
             "disabled": entity.disabled,
-            "platform": entity.platform,
-        }
-        
-        if state:
-            entity_data.update({
-                "state": state.state,
-                "attributes": dict(state.attributes),
-                "last_updated": state.last_updated.isoformat(),
-                "last_changed": state.last_changed.isoformat(),
-            })
-        
-        data["entities"].append(entity_data)
-    
+            "state": state.state if state else None,
+        })
+
     return data
 
 async def async_get_device_diagnostics(
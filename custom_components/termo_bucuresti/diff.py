@@ -0,0 +1,41 @@
+"""Snapshot diffing for Termo Bucuresti.
+
+Interruptions are compared by their stable identifier, so the work done after
+a poll depends on how many interruptions changed, not on the page size.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .models import Interruption, Snapshot
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotDiff:
+    """Interruptions that changed between two snapshots."""
+
+    started: Tuple[Interruption, ...] = ()
+    updated: Tuple[Interruption, ...] = ()
+    resolved: Tuple[Interruption, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.started or self.updated or self.resolved)
+
+
+def diff_snapshots(previous: Optional[Snapshot], current: Snapshot) -> SnapshotDiff:
+    """Classify the interruptions of ``current`` against ``previous``."""
+    before = previous.by_id() if previous is not None else {}
+    after = current.by_id()
+
+    started = []
+    updated = []
+    for ep_id, interruption in after.items():
+        old = before.get(ep_id)
+        if old is None:
+            started.append(interruption)
+        elif old.content != interruption.content:
+            updated.append(interruption)
+
+    resolved = tuple(
+        interruption for ep_id, interruption in before.items() if ep_id not in after
+    )
+    return SnapshotDiff(tuple(started), tuple(updated), resolved)
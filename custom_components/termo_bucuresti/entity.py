@@ -0,0 +1,80 @@
+"""Base entity for Termo Bucuresti."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import slugify
+from .const import VOLATILE_ATTRIBUTES, ATTR_DATE_ACTUALIZATE_LA, ATTR_DATE_INVECHITE
+from .coordinator import TermoDataUpdateCoordinator, get_streets
+from .models import StreetSnapshot
+
+
+class TermoStreetEntity(CoordinatorEntity):
+    """Entity of one watched street, fed by the shared coordinator.
+
+    The sensor and binary sensor base classes add their platform entity,
+    name the attribute holding their state and implement ``_update_state``.
+    """
+
+    # Atributul care ține starea entității, diferit pentru fiecare platformă
+    _state_attribute = "_attr_state"
+
+    def __init__(self, coordinator: TermoDataUpdateCoordinator, entry: ConfigEntry, street: str):
+        super().__init__(coordinator)
+        self._entry = entry
+        self._street = street
+        # Prima stradă păstrează identificatorii entităților create înainte de listele de străzi
+        if street == get_streets(entry)[0]:
+            self._id_suffix = entry.entry_id
+        else:
+            self._id_suffix = f"{entry.entry_id}_{slugify(street)}"
+
+    @property
+    def _interruption_data(self) -> StreetSnapshot:
+        """Return this street's part of the coordinator snapshot."""
+        if not self.coordinator.data:
+            return StreetSnapshot(self._street)
+        return self.coordinator.data.strazi.get(self._street) or StreetSnapshot(self._street)
+
+    @property
+    def _last_update(self):
+        """Return the time of the last successful fetch."""
+        return self.coordinator.last_update
+
+    async def async_added_to_hass(self) -> None:
+        """Apply the data already fetched by the coordinator."""
+        await super().async_added_to_hass()
+        if self.coordinator.data is not None:
+            self._update_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Apply the freshly parsed data, writing state only if it changed."""
+        previous = self._state_signature()
+        if self.coordinator.data is not None:
+            self._update_state()
+        if self._state_signature() != previous:
+            self.async_write_ha_state()
+
+    def _state_signature(self) -> tuple:
+        """Return what this entity would write, minus per-poll timestamps."""
+        attributes = getattr(self, "_attr_extra_state_attributes", None) or {}
+        return (
+            self.available,
+            self.coordinator.stale,
+            getattr(self, self._state_attribute, None),
+            self._attr_icon,
+            {key: val for key, val in attributes.items() if key not in VOLATILE_ATTRIBUTES},
+        )
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes plus the freshness of the underlying page."""
+        attributes = dict(getattr(self, "_attr_extra_state_attributes", None) or {})
+        fetched_at = self.coordinator.data_fetched_at
+        attributes[ATTR_DATE_ACTUALIZATE_LA] = fetched_at.isoformat() if fetched_at else None
+        attributes[ATTR_DATE_INVECHITE] = self.coordinator.stale
+        return attributes
+
+    def _update_state(self) -> None:
+        """Update the entity from the coordinator data - implemented by each platform."""
+        raise NotImplementedError
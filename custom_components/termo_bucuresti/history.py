@@ -0,0 +1,343 @@
+"""Persistent interruption history for Termo Bucuresti.
+
+Episodes are written to an append-only JSON lines file: one ``start`` line
+when an interruption appears and one ``end`` line when it disappears. On load
+the log is replayed into in-memory indexes (by street, by start time and
+hourly aggregate buckets) and into rolling per-street statistics, so reports
+never rescan the log or HA's recorder.
+"""
+import bisect
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .outage_stats import WINDOWS, OutageStatistics
+
+_LOGGER = logging.getLogger(__name__)
+
+HISTORY_FILE = "termo_bucuresti_history.jsonl"
+
+BUCKET_SECONDS = 3600
+
+# Câmpurile unei întreruperi salvate în istoric
+EPISODE_FIELDS = ('strada', 'serviciu', 'cauza', 'data_estimata', 'ora_estimata')
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Return a human readable duration."""
+    if seconds is None:
+        return "N/A"
+    minutes = int(seconds // 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+# Coloanele fișierelor exportate
+EXPORT_FIELDS = (
+    'id', 'strada', 'serviciu', 'cauza', 'data_estimata', 'ora_estimata',
+    'inceput', 'sfarsit', 'durata_secunde'
+)
+
+
+def export_episodes(episodes: Iterable[Dict[str, Any]], path: str, export_format: str) -> int:
+    """Write ``episodes`` to ``path`` one row at a time and return the row count.
+
+    Blocking, run it in the executor. Rows are produced lazily from
+    ``episodes``, so memory use does not grow with the size of the export.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as out:
+        if export_format == 'csv':
+            writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for episode in episodes:
+                writer.writerow(_export_row(episode))
+                count += 1
+        else:
+            out.write('[')
+            for episode in episodes:
+                out.write(',\n' if count else '\n')
+                out.write(json.dumps(_export_row(episode), ensure_ascii=False))
+                count += 1
+            out.write('\n]\n')
+    return count
+
+
+def _export_row(episode: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the exported form of one episode."""
+    row = {name: episode.get(name) for name in EXPORT_FIELDS}
+    started, ended = episode['inceput'], episode['sfarsit']
+    row['inceput'] = _isoformat(started)
+    row['sfarsit'] = _isoformat(ended)
+    row['durata_secunde'] = int(ended - started) if ended is not None else None
+    return row
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    """Return ``timestamp`` as an ISO 8601 UTC string."""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class _Bucket:
+    """Aggregates of the episodes started inside one hour."""
+
+    __slots__ = ('count', 'ended', 'duration', 'services')
+
+    def __init__(self):
+        self.count = 0
+        self.ended = 0
+        self.duration = 0.0
+        self.services: Dict[str, int] = {}
+
+
+class HistoryStore:
+    """Append-only interruption history with time and street indexes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._episodes: Dict[str, Dict[str, Any]] = {}
+        self._open: Dict[str, str] = {}
+        self._by_street: Dict[str, List[str]] = {}
+        self._by_start: List[tuple] = []
+        self._buckets: Dict[int, _Bucket] = {}
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        self._statistics: Dict[str, OutageStatistics] = {}
+        self._loading = False
+
+    def load(self) -> None:
+        """Replay the log from disk. Blocking, run it in the executor."""
+        if not os.path.exists(self.path):
+            return
+        self._loading = True
+        try:
+            with open(self.path, encoding='utf-8') as log:
+                for line_no, line in enumerate(log, 1):
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        _LOGGER.warning("Linie invalidă %d în istoricul %s", line_no, self.path)
+                        continue
+                    self._apply(event)
+        finally:
+            self._loading = False
+        self._rebuild_statistics(time.time())
+
+    def flush(self) -> None:
+        """Append the pending events to disk. Blocking, run it in the executor."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as log:
+                log.writelines(pending)
+
+    def sync_street(
+        self, street: str, interruptions: Iterable[Any], now: Optional[float] = None
+    ) -> None:
+        """Record the episodes that started or ended for ``street``."""
+        now = time.time() if now is None else now
+        active = {}
+        for interruption in interruptions:
+            active.setdefault(interruption.id, interruption)
+
+        for ep_id, interruption in active.items():
+            if ep_id not in self._open:
+                self.record_start(ep_id, interruption, now)
+
+        for ep_id, street_open in list(self._open.items()):
+            if street_open == street and ep_id not in active:
+                self.record_end(ep_id, now)
+
+    def close_unwatched(self, watched: Iterable[str], now: Optional[float] = None) -> int:
+        """End the open episodes of the streets not in ``watched``; return their count.
+
+        ``sync_street`` only runs for watched streets, so without this the
+        episodes of a removed street would stay open forever.
+        """
+        now = time.time() if now is None else now
+        watched = set(watched)
+        orphans = [ep_id for ep_id, street in self._open.items() if street not in watched]
+        for ep_id in orphans:
+            self.record_end(ep_id, now)
+        return len(orphans)
+
+    def record_start(self, ep_id: str, interruption: Any, started: float) -> None:
+        """Record a new episode of an ``Interruption``."""
+        event = {'type': 'start', 'id': ep_id, 't': started}
+        event.update({name: str(getattr(interruption, name)) for name in EPISODE_FIELDS})
+        self._append(event)
+
+    def record_end(self, ep_id: str, ended: float) -> None:
+        """Record the end of an open episode."""
+        self._append({'type': 'end', 'id': ep_id, 't': ended})
+
+    def episodes(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        street: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the episodes started in ``[start, end)``, oldest first."""
+        if street is not None:
+            episodes = sorted(
+                (self._episodes[key] for key in self._by_street.get(street, ())),
+                key=lambda episode: episode['inceput'],
+            )
+            for episode in episodes:
+                if ((start is None or episode['inceput'] >= start) and
+                        (end is None or episode['inceput'] < end)):
+                    yield episode
+            return
+
+        lo = 0 if start is None else bisect.bisect_left(self._by_start, (start,))
+        hi = len(self._by_start) if end is None else bisect.bisect_left(self._by_start, (end,))
+        for _started, key in self._by_start[lo:hi]:
+            yield self._episodes[key]
+
+    def is_open(self, ep_id: str) -> bool:
+        """Return whether the episode ``ep_id`` is still ongoing."""
+        return ep_id in self._open
+
+    def started_at(self, ep_id: str) -> Optional[float]:
+        """Return when the ongoing episode ``ep_id`` started."""
+        if ep_id not in self._open:
+            return None
+        return self._episodes[self._latest_key(ep_id)]['inceput']
+
+    def statistics(self, street: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Return the rolling outage statistics of ``street``."""
+        now = time.time() if now is None else now
+        stats = self._statistics.get(street) or OutageStatistics()
+        return stats.summary(now)
+
+    def streets(self) -> List[str]:
+        """Return the streets present in the history."""
+        return list(self._by_street)
+
+    def report(self, days: int, now: Optional[float] = None) -> Dict[str, Any]:
+        """Summarize the episodes started in the last ``days`` days."""
+        now = time.time() if now is None else now
+        first_bucket = int((now - days * 86400) // BUCKET_SECONDS)
+        last_bucket = int(now // BUCKET_SECONDS)
+
+        count = ended = 0
+        duration = 0.0
+        services: Dict[str, int] = {}
+        for bucket_key in range(first_bucket, last_bucket + 1):
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                continue
+            count += bucket.count
+            ended += bucket.ended
+            duration += bucket.duration
+            for service, service_count in bucket.services.items():
+                services[service] = services.get(service, 0) + service_count
+
+        return {
+            'total_interruptions': count,
+            'ongoing_interruptions': len(self._open),
+            'services_affected': sorted(services),
+            'interruptions_by_service': services,
+            'average_duration': format_duration(duration / ended if ended else None),
+        }
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        """Apply ``event`` to the indexes and queue it for disk."""
+        if self._apply(event):
+            line = json.dumps(event, ensure_ascii=False) + '\n'
+            with self._lock:
+                self._pending.append(line)
+
+    def _apply(self, event: Dict[str, Any]) -> bool:
+        """Update the in-memory indexes with one logged event."""
+        ep_id = event.get('id')
+        if event.get('type') == 'start':
+            if ep_id in self._open:
+                return False
+            episode = {name: event.get(name) for name in EPISODE_FIELDS}
+            episode.update({'id': ep_id, 'inceput': event['t'], 'sfarsit': None})
+            # Un episod încheiat care reapare primește un identificator nou
+            key = ep_id if ep_id not in self._episodes else f"{ep_id}@{int(event['t'])}"
+            self._episodes[key] = episode
+            self._open[ep_id] = episode['strada']
+            self._by_street.setdefault(episode['strada'], []).append(key)
+            bisect.insort(self._by_start, (episode['inceput'], key))
+
+            bucket = self._bucket(episode['inceput'])
+            bucket.count += 1
+            service = episode['serviciu']
+            bucket.services[service] = bucket.services.get(service, 0) + 1
+            if not self._loading:
+                self._street_statistics(episode['strada']).record_start(service, episode['inceput'])
+            return True
+
+        if event.get('type') == 'end':
+            if ep_id not in self._open:
+                return False
+            del self._open[ep_id]
+            key = self._latest_key(ep_id)
+            episode = self._episodes[key]
+            episode['sfarsit'] = event['t']
+
+            bucket = self._bucket(episode['inceput'])
+            bucket.ended += 1
+            bucket.duration += max(0.0, event['t'] - episode['inceput'])
+            if not self._loading:
+                self._street_statistics(episode['strada']).record_end(
+                    episode['serviciu'], episode['inceput'], event['t']
+                )
+            return True
+
+        return False
+
+    def _rebuild_statistics(self, now: float) -> None:
+        """Feed the episodes of the longest window to the statistics, in time order."""
+        cutoff = now - max(span for _name, span in WINDOWS)
+        events = []
+        for episode in self._episodes.values():
+            if episode['inceput'] >= cutoff:
+                events.append((episode['inceput'], 0, episode))
+            if episode['sfarsit'] is not None and episode['sfarsit'] >= cutoff:
+                events.append((episode['sfarsit'], 1, episode))
+        events.sort(key=lambda event: event[:2])
+
+        self._statistics = {}
+        for moment, is_end, episode in events:
+            stats = self._street_statistics(episode['strada'])
+            if is_end:
+                stats.record_end(episode['serviciu'], episode['inceput'], moment)
+            else:
+                stats.record_start(episode['serviciu'], moment)
+
+    def _street_statistics(self, street: str) -> OutageStatistics:
+        """Return the rolling statistics of ``street``."""
+        stats = self._statistics.get(street)
+        if stats is None:
+            stats = self._statistics[street] = OutageStatistics()
+        return stats
+
+    def _latest_key(self, ep_id: str) -> str:
+        """Return the key of the most recent episode with ``ep_id``."""
+        street = self._episodes[ep_id]['strada']
+        for key in reversed(self._by_street[street]):
+            if key.split('@', 1)[0] == ep_id:
+                return key
+        return ep_id
+
+    def _bucket(self, timestamp: float) -> _Bucket:
+        """Return the hourly bucket containing ``timestamp``."""
+        key = int(timestamp // BUCKET_SECONDS)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        return bucket
@@ -0,0 +1,68 @@
+"""Multi-pattern string matcher for Termo Bucuresti.
+
+The patterns are stored in a trie that is compiled once into a single regular
+expression with shared prefixes, so every pattern is found in one pass over
+the text at C speed.
+"""
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+_TERMINAL = ''
+
+
+class TrieMatcher:
+    """Find every occurrence of a fixed set of patterns in one pass."""
+
+    def __init__(self, patterns: Iterable[str]):
+        trie: Dict[str, dict] = {}
+        self.patterns: Tuple[str, ...] = tuple(dict.fromkeys(p for p in patterns if p))
+        for pattern in self.patterns:
+            node = trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[_TERMINAL] = {}
+
+        # Pentru fiecare model reținem modelele care îi sunt prefix: la o poziție
+        # expresia găsește doar cea mai lungă potrivire, dar le acoperă și pe ele
+        self._prefixes: Dict[str, Tuple[str, ...]] = {}
+        for pattern in self.patterns:
+            node, found = trie, []
+            for end, char in enumerate(pattern, 1):
+                node = node[char]
+                if _TERMINAL in node:
+                    found.append(pattern[:end])
+            self._prefixes[pattern] = tuple(found)
+
+        body = _trie_to_regex(trie) if self.patterns else '(?!)'
+        self._search = re.compile(body)
+        # Potrivirile se pot suprapune, deci căutăm în lookahead la fiecare poziție
+        self._scan = re.compile(f'(?=({body}))')
+
+    def search(self, text: str) -> bool:
+        """Return whether any pattern occurs in ``text``."""
+        return self._search.search(text) is not None
+
+    def find_all(self, text: str) -> Set[str]:
+        """Return every pattern occurring in ``text``."""
+        found: Set[str] = set()
+        for match in self._scan.finditer(text):
+            found.update(self._prefixes[match.group(1)])
+        return found
+
+
+def _trie_to_regex(node: Dict[str, dict]) -> str:
+    """Return a regex matching the longest pattern stored below ``node``."""
+    branches: List[str] = [
+        re.escape(char) + _trie_to_regex(child)
+        for char, child in sorted(node.items()) if char != _TERMINAL
+    ]
+    if not branches:
+        return ''
+    if len(branches) == 1:
+        body = branches[0]
+    else:
+        body = '(?:' + '|'.join(branches) + ')'
+    if _TERMINAL in node:
+        # Ramura este opțională, iar cuantificatorul lacom preferă potrivirea mai lungă
+        return f'(?:{body})?'
+    return body
@@ -0,0 +1,165 @@
+"""Data model shared by the Termo Bucuresti platforms.
+
+Records are immutable and slot based; every entity of an entry references the
+same ``Snapshot`` instead of keeping its own copy.
+"""
+import hashlib
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+NESPECIFICAT = "Nespecificat"
+
+
+class Serviciu(StrEnum):
+    """Service affected by an interruption."""
+
+    APA_CALDA = "Apă caldă"
+    CALDURA = "Căldură"
+    TERMIC = "Serviciu termic"
+
+
+# Servicii care afectează fiecare tip de senzor
+SERVICII_APA_CALDA = frozenset({Serviciu.APA_CALDA, Serviciu.TERMIC})
+SERVICII_CALDURA = frozenset({Serviciu.CALDURA, Serviciu.TERMIC})
+
+
+def intern_cause(cauza: str) -> str:
+    """Return the shared instance of a cause string."""
+    return sys.intern(cauza)
+
+
+def interruption_id(strada: str, serviciu: str, cauza: str) -> str:
+    """Return the stable identifier of an interruption.
+
+    The identifier only depends on what the outage is (street, service and
+    cause), so it survives changes of the description or of the estimated
+    restore time between polls.
+    """
+    key = f"{strada}|{serviciu}|{cauza}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def interruption_ids(strada: str, records: Iterable[Tuple[str, str]]) -> List[str]:
+    """Return the identifiers of a street's ``(serviciu, cauza)`` records, in page order.
+
+    The same interruption mentioned again on the page gets a ``-N`` suffix,
+    so every record keeps a distinct identifier.
+    """
+    ids = []
+    seen: Dict[str, int] = {}
+    for serviciu, cauza in records:
+        ep_id = interruption_id(strada, serviciu, cauza)
+        seen[ep_id] = seen.get(ep_id, 0) + 1
+        ids.append(ep_id if seen[ep_id] == 1 else f"{ep_id}-{seen[ep_id]}")
+    return ids
+
+
+@dataclass(frozen=True, slots=True)
+class Interruption:
+    """One interruption affecting a watched street."""
+
+    id: str
+    strada: str
+    serviciu: Serviciu
+    cauza: str
+    descriere: str
+    data_estimata: str
+    ora_estimata: str
+    detectat_la: datetime
+
+    @property
+    def content(self) -> Tuple[str, str, str]:
+        """Return the fields whose change makes the interruption "updated"."""
+        return (self.descriere, self.data_estimata, self.ora_estimata)
+
+
+@dataclass(frozen=True, slots=True)
+class StreetSnapshot:
+    """Interruptions of one street at a given poll."""
+
+    strada: str
+    interruptions: Tuple[Interruption, ...] = ()
+
+    @property
+    def total_gasite(self) -> int:
+        """Return the number of interruptions."""
+        return len(self.interruptions)
+
+    def for_services(self, servicii: frozenset) -> Tuple[Interruption, ...]:
+        """Return the interruptions affecting any of ``servicii``."""
+        return tuple(i for i in self.interruptions if i.serviciu in servicii)
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """Result of one poll for all streets of an entry."""
+
+    strazi: Dict[str, StreetSnapshot] = field(default_factory=dict)
+    ultima_actualizare: Optional[datetime] = None
+
+    @property
+    def total_gasite(self) -> int:
+        """Return the number of interruptions across all streets."""
+        return sum(street.total_gasite for street in self.strazi.values())
+
+    def by_id(self) -> Dict[str, Interruption]:
+        """Return every interruption of the snapshot keyed by its identifier."""
+        return {
+            interruption.id: interruption
+            for street in self.strazi.values()
+            for interruption in street.interruptions
+        }
+
+
+def snapshot_to_dict(snapshot: Snapshot) -> Dict[str, Any]:
+    """Return a JSON-serializable form of ``snapshot``."""
+    return {
+        'ultima_actualizare': _isoformat(snapshot.ultima_actualizare),
+        'strazi': {
+            strada: [
+                {
+                    'id': i.id,
+                    'serviciu': str(i.serviciu),
+                    'cauza': i.cauza,
+                    'descriere': i.descriere,
+                    'data_estimata': i.data_estimata,
+                    'ora_estimata': i.ora_estimata,
+                    'detectat_la': i.detectat_la.isoformat(),
+                }
+                for i in street.interruptions
+            ]
+            for strada, street in snapshot.strazi.items()
+        },
+    }
+
+
+def snapshot_from_dict(data: Dict[str, Any]) -> Snapshot:
+    """Rebuild a snapshot saved with ``snapshot_to_dict``."""
+    strazi = {}
+    for strada, interruptions in data.get('strazi', {}).items():
+        strazi[strada] = StreetSnapshot(strada, tuple(
+            Interruption(
+                id=item['id'],
+                strada=strada,
+                serviciu=Serviciu(item['serviciu']),
+                cauza=intern_cause(item['cauza']),
+                descriere=item['descriere'],
+                data_estimata=item['data_estimata'],
+                ora_estimata=item['ora_estimata'],
+                detectat_la=datetime.fromisoformat(item['detectat_la']),
+            )
+            for item in interruptions
+        ))
+    ultima_actualizare = data.get('ultima_actualizare')
+    return Snapshot(
+        strazi=strazi,
+        ultima_actualizare=datetime.fromisoformat(ultima_actualizare) if ultima_actualizare else None,
+    )
+
+
+def _isoformat(moment: Optional[datetime]) -> Optional[str]:
+    """Return ``moment`` in ISO format, keeping ``None``."""
+    return moment.isoformat() if moment is not None else None
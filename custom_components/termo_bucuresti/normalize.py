@@ -0,0 +1,69 @@
+"""Street name normalization for Termo Bucuresti.
+
+Both the configured streets and the page fragments go through the same
+normalization, so "Str. Ştefan cel Mare", "strada stefan cel mare" and
+"Str. Șt. cel Mare" all become "strada stefan cel mare". The type of the
+street is kept, so "Calea Victoriei" does not match "Piața Victoriei"; a
+configured name without a type, such as "Victoriei", matches any of them.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Tipul arterei, scris cu prescurtare sau complet, devine același cuvânt în ambele părți
+STREET_TYPES = {
+    'str': 'strada', 'strada': 'strada',
+    'bd': 'bulevardul', 'bdul': 'bulevardul', 'b-dul': 'bulevardul',
+    'blvd': 'bulevardul', 'bulevardul': 'bulevardul',
+    'sos': 'soseaua', 'soseaua': 'soseaua',
+    'cal': 'calea', 'calea': 'calea',
+    'spl': 'splaiul', 'splaiul': 'splaiul',
+    'intr': 'intrarea', 'intrarea': 'intrarea',
+    'al': 'aleea', 'aleea': 'aleea',
+    'pta': 'piata', 'p-ta': 'piata', 'piata': 'piata',
+}
+
+# Prenume și grade abreviate în numele străzilor; se extind doar când sunt urmate de punct
+ABBREVIATIONS = {
+    'st': 'stefan',
+    'gh': 'gheorghe',
+    'n': 'nicolae',
+    'i': 'ion',
+    'c': 'constantin',
+    'm': 'mihai',
+    'gen': 'general',
+    'mr': 'maior',
+    'cpt': 'capitan',
+    'lt': 'locotenent',
+    'sg': 'sergent',
+    'dr': 'doctor',
+    'prof': 'profesor',
+}
+
+TOKEN_RE = re.compile(r'([\w-]+)(\.?)')
+
+
+def fold_diacritics(text: str) -> str:
+    """Remove diacritics, covering both cedilla and comma-below variants."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=4096)
+def normalize_street(text: str) -> str:
+    """Return the comparison form of a street name or page fragment.
+
+    Results are cached, so unchanged fragments of consecutive pages and the
+    configured streets are normalized only once.
+    """
+    tokens = []
+    for token, dot in TOKEN_RE.findall(fold_diacritics(text).lower()):
+        token = token.strip('-')
+        if not token:
+            continue
+        if token in STREET_TYPES:
+            token = STREET_TYPES[token]
+        elif dot and token in ABBREVIATIONS:
+            token = ABBREVIATIONS[token]
+        tokens.append(token)
+    return ' '.join(tokens)
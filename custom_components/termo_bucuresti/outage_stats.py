@@ -0,0 +1,121 @@
+"""Rolling outage statistics for Termo Bucuresti.
+
+Counters are updated when an episode starts or ends and expire old events
+from the front of their window, so keeping them current costs amortized
+O(1) per event instead of a scan of the history. Events must arrive in time
+order.
+"""
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+from .models import Serviciu
+
+# Ferestrele statisticilor: (nume, durată în secunde)
+WINDOWS = (
+    ('24h', 24 * 3600),
+    ('7d', 7 * 86400),
+    ('30d', 30 * 86400),
+)
+
+TOTAL = 'total'
+# Cheile serviciilor în atribute, fără diacritice
+SERVICE_KEYS = {
+    Serviciu.APA_CALDA: 'apa_calda',
+    Serviciu.CALDURA: 'caldura',
+    Serviciu.TERMIC: 'termic',
+}
+
+
+class RollingWindow:
+    """Outages started and ended within the last ``span`` seconds.
+
+    The longest outage is tracked with a monotonic deque: an ended outage
+    hides every earlier, shorter one, which can never be the maximum again.
+    """
+
+    __slots__ = ('span', '_starts', '_ends', '_longest', '_downtime')
+
+    def __init__(self, span: float):
+        self.span = span
+        self._starts: Deque[float] = deque()
+        self._ends: Deque[Tuple[float, float]] = deque()
+        self._longest: Deque[Tuple[float, float]] = deque()
+        self._downtime = 0.0
+
+    def add_start(self, started: float) -> None:
+        """Count an outage that started at ``started``."""
+        self._starts.append(started)
+
+    def add_end(self, ended: float, duration: float) -> None:
+        """Add the downtime of an outage that ended at ``ended``."""
+        self._ends.append((ended, duration))
+        self._downtime += duration
+        while self._longest and self._longest[-1][1] <= duration:
+            self._longest.pop()
+        self._longest.append((ended, duration))
+
+    def expire(self, now: float) -> None:
+        """Drop the events that left the window."""
+        cutoff = now - self.span
+        while self._starts and self._starts[0] < cutoff:
+            self._starts.popleft()
+        while self._ends and self._ends[0][0] < cutoff:
+            self._downtime -= self._ends.popleft()[1]
+        while self._longest and self._longest[0][0] < cutoff:
+            self._longest.popleft()
+        if not self._ends:
+            # Evităm acumularea erorilor de rotunjire
+            self._downtime = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """Return count, total and mean downtime and the longest outage, in minutes."""
+        ended = len(self._ends)
+        return {
+            'numar': len(self._starts),
+            'durata_totala_min': round(self._downtime / 60, 1),
+            'durata_medie_min': round(self._downtime / ended / 60, 1) if ended else 0.0,
+            'cea_mai_lunga_min': round(self._longest[0][1] / 60, 1) if self._longest else 0.0,
+        }
+
+
+class OutageStatistics:
+    """Rolling windows of one street, for every service and in total."""
+
+    __slots__ = ('_windows',)
+
+    def __init__(self):
+        self._windows: Dict[str, Dict[str, RollingWindow]] = {
+            name: {key: RollingWindow(span) for key in (TOTAL, *SERVICE_KEYS.values())}
+            for name, span in WINDOWS
+        }
+
+    def record_start(self, serviciu: str, started: float) -> None:
+        """Count an outage of ``serviciu`` that started at ``started``."""
+        for windows in self._windows.values():
+            for key in (TOTAL, _service_key(serviciu)):
+                windows[key].add_start(started)
+
+    def record_end(self, serviciu: str, started: float, ended: float) -> None:
+        """Add an outage of ``serviciu`` that ended at ``ended``."""
+        duration = max(0.0, ended - started)
+        for windows in self._windows.values():
+            for key in (TOTAL, _service_key(serviciu)):
+                windows[key].add_end(ended, duration)
+
+    def summary(self, now: float) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return the statistics of every window and service at ``now``."""
+        result = {}
+        for name, windows in self._windows.items():
+            result[name] = {}
+            for key, window in windows.items():
+                window.expire(now)
+                result[name][key] = window.summary()
+        return result
+
+
+def _service_key(serviciu: str) -> str:
+    """Return the attribute key of a service stored in the history."""
+    try:
+        return SERVICE_KEYS[Serviciu(serviciu)]
+    except ValueError:
+        return SERVICE_KEYS[Serviciu.TERMIC]
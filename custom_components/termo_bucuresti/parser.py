@@ -0,0 +1,341 @@
+"""Parser for the CMTEB interruptions page.
+
+The page is parsed once per download into a ``PageIndex``; every config entry
+then answers its street with a dictionary lookup instead of rescanning the
+HTML.
+"""
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Pattern, Tuple
+
+from .matcher import TrieMatcher
+from .models import NESPECIFICAT, Serviciu, intern_cause
+from .normalize import fold_diacritics, normalize_street
+from .telemetry import FetchStats
+
+# Cuvinte cheie folosite de senzori și de senzorii binari
+SERVICE_KEYWORDS = ['apă', 'caldă', 'căldură', 'termic']
+INTERRUPTION_KEYWORDS = [
+    'întrerupere', 'avarie', 'defect', 'repara', 'intervenție',
+    'apă caldă', 'căldură', 'serviciu termic'
+]
+
+KEYWORD_MATCHER = TrieMatcher(SERVICE_KEYWORDS + INTERRUPTION_KEYWORDS)
+
+# Secțiunea de întreruperi se încheie înaintea subsolului paginii
+CONTENT_END_MARKER = '<footer'
+
+SECTION_SPLIT_RE = re.compile(r'</?div|</?tr|</?p|</?li')
+TAG_RE = re.compile(r'<[^>]+>')
+# Restul etichetei la care a fost tăiat fragmentul (de exemplu ' class="sector">')
+TAG_TAIL_RE = re.compile(r'^[^<>]*>')
+WHITESPACE_RE = re.compile(r'\s+')
+WORD_RE = re.compile(r'\w+')
+SECTOR_RE = re.compile(r'\bsector(?:ul)?\s*([1-6])\b')
+PUNCT_TERMIC_RE = re.compile(r'\b(centru|vest|sud|nord|est)\b')
+# Într-o înregistrare punctul termic se recunoaște doar explicit: "Gara de Nord" nu este unul
+RECORD_PUNCT_TERMIC_RE = re.compile(r'\bpunct(?:ul|ele)?\s+termic(?:e)?\s+(centru|vest|sud|nord|est)\b')
+# Un titlu de bloc conține doar sectoare, puncte termice și separatori
+HEADING_RE = re.compile(
+    r'(?:(?:sector(?:ul)?\s*[1-6]|(?:punct(?:ul|ele)?\s+termic(?:e)?\s+)?'
+    r'(?:centru|vest|sud|nord|est)|zona|si)\b|[\s\-:,/.()])+'
+)
+
+# Cheia de index pentru înregistrările din afara oricărui bloc
+NO_BLOCK = ''
+# Un titlu de bloc este un fragment scurt care numește doar sectorul / punctul termic
+MAX_HEADING_LENGTH = 60
+
+
+@dataclass
+class PageIndex:
+    """Interruption records of one CMTEB page, indexed for lookups."""
+
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    by_token: Dict[str, List[int]] = field(default_factory=dict)
+    by_sector: Dict[str, List[int]] = field(default_factory=dict)
+    by_punct_termic: Dict[str, List[int]] = field(default_factory=dict)
+    fragment_count: int = 0
+    # SHA-256 al octeților paginii, completat de client după descărcare
+    content_hash: str = ""
+    fetched_at: float = 0.0
+    # Măsurătorile ultimei descărcări care a produs sau confirmat pagina
+    stats: Optional[FetchStats] = None
+
+    def lookup_many(
+        self,
+        matcher: TrieMatcher,
+        sector: Optional[str] = None,
+        punct_termic: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return the records of every street in ``matcher``, in page order.
+
+        ``matcher`` holds normalized street names. Only the records that
+        contain the rarest word of some street are candidates; all streets are
+        then matched in a single pass over each candidate left by the block
+        filters.
+        """
+        result: Dict[str, List[Dict[str, Any]]] = {street: [] for street in matcher.patterns}
+        candidates = self._street_candidates(matcher)
+        # Blocurile altor sectoare / puncte termice sunt eliminate înaintea
+        # verificării străzii și a extragerii câmpurilor
+        candidates = self._in_block(candidates, self.by_sector, sector)
+        candidates = self._in_block(candidates, self.by_punct_termic, punct_termic)
+
+        for idx in sorted(candidates):
+            streets = matcher.find_all(self.records[idx]['text'])
+            if streets:
+                record = _materialize(self.records[idx])
+                for street in streets:
+                    result[street].append(record)
+        return result
+
+    def _street_candidates(self, matcher: TrieMatcher) -> set:
+        """Return the records containing the rarest word of at least one street."""
+        candidates: set = set()
+        for street in matcher.patterns:
+            postings = [self.by_token.get(token) for token in WORD_RE.findall(street)]
+            if postings and all(postings):
+                # Pornim de la cel mai rar cuvânt din numele străzii
+                candidates.update(min(postings, key=len))
+        return candidates
+
+    @staticmethod
+    def _in_block(candidates: set, by_block: Dict[str, List[int]], block: Optional[str]) -> set:
+        """Keep the candidates inside ``block`` or outside any block."""
+        if not block or block == "toate" or not candidates:
+            return candidates
+        allowed = set(by_block.get(block, ()))
+        allowed.update(by_block.get(NO_BLOCK, ()))
+        return candidates & allowed
+
+
+_MATERIALIZE_LOCK = threading.Lock()
+
+
+def _materialize(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the fields of a record on its first lookup."""
+    if 'html' in record:
+        # Mai multe intrări pot căuta în același index din fire diferite
+        with _MATERIALIZE_LOCK:
+            section = record.get('html')
+            if section is not None:
+                record.update(extract_fields(section))
+                record['cauza'] = intern_cause(record['cauza'])
+                record['serviciu'] = extract_service_type(section)
+                del record['html']
+    return record
+
+
+class PageParser:
+    """Incremental parser fed with decoded chunks of the CMTEB page.
+
+    Every fragment is turned into a record as soon as its closing boundary
+    arrives, so the full page is never held in memory. Parsing stops early
+    once ``end_marker`` (the end of the interruptions section) is seen.
+
+    Fragments that only name a sector or thermal point open a block; the
+    records that follow inherit it until the next heading. Field extraction
+    is deferred to ``PageIndex.lookup_many``, so records discarded by the block
+    filters or the street match are never extracted.
+    """
+
+    def __init__(self, end_marker: Optional[str] = CONTENT_END_MARKER):
+        self.index = PageIndex()
+        self._sector_block: Tuple[str, ...] = ()
+        self._punct_termic_block: Tuple[str, ...] = ()
+        self.done = False
+        self._end_marker = end_marker.lower() if end_marker else None
+        self._buffer = ''
+        self._by_token = defaultdict(list)
+        self._by_sector = defaultdict(list)
+        self._by_punct_termic = defaultdict(list)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume ``chunk`` and return the records completed by it."""
+        if self.done or not chunk:
+            return []
+
+        buffer = self._buffer + chunk
+        if self._end_marker:
+            end = buffer.lower().find(self._end_marker)
+            if end != -1:
+                buffer = buffer[:end]
+                self.done = True
+
+        # Ultimul fragment poate fi incomplet și rămâne în buffer până la următoarea graniță
+        sections = SECTION_SPLIT_RE.split(buffer)
+        self._buffer = '' if self.done else sections.pop()
+        records = [record for record in map(self._add_section, sections) if record]
+        if self.done:
+            records.extend(self._finish_buffer())
+        return records
+
+    def close(self) -> PageIndex:
+        """Flush the last fragment and return the finished index."""
+        self._finish_buffer()
+        self.done = True
+        index = self.index
+        index.by_token = dict(self._by_token)
+        index.by_sector = dict(self._by_sector)
+        index.by_punct_termic = dict(self._by_punct_termic)
+        return index
+
+    def _finish_buffer(self) -> List[Dict[str, Any]]:
+        """Process the pending fragment, if any."""
+        buffer, self._buffer = self._buffer, ''
+        if not buffer:
+            return []
+        record = self._add_section(buffer)
+        return [record] if record else []
+
+    def _add_section(self, section: str) -> Optional[Dict[str, Any]]:
+        """Turn one complete fragment into an indexed record."""
+        self.index.fragment_count += 1
+        section = TAG_TAIL_RE.sub('', section, count=1)
+        section_lower = section.lower()
+        if not KEYWORD_MATCHER.search(section_lower):
+            if 'sector' in section_lower or PUNCT_TERMIC_RE.search(section_lower):
+                self._update_blocks(clean_text(section_lower))
+            return None
+
+        descriere = clean_text(section)
+        # "Punct termic Vest" conține cuvântul cheie "termic", dar este tot un titlu
+        if 'termic' in section_lower and self._update_blocks(descriere.lower()):
+            return None
+        text = normalize_street(descriere)
+        record_id = len(self.index.records)
+        sectoare = _sectors(text) or self._sector_block
+        puncte_termice = (
+            tuple(sorted(set(RECORD_PUNCT_TERMIC_RE.findall(text)))) or self._punct_termic_block
+        )
+        record = {
+            'offset': self.index.fragment_count - 1,
+            'descriere': descriere[:200],
+            'text': text,
+            'sectoare': sectoare,
+            'puncte_termice': puncte_termice,
+            'html': section,
+        }
+        self.index.records.append(record)
+
+        for token in set(WORD_RE.findall(text)):
+            self._by_token[token].append(record_id)
+        for sector in sectoare or (NO_BLOCK,):
+            self._by_sector[sector].append(record_id)
+        for punct in puncte_termice or (NO_BLOCK,):
+            self._by_punct_termic[punct].append(record_id)
+        return record
+
+    def _update_blocks(self, text: str) -> bool:
+        """Open a new sector / thermal point block if the cleaned, lowercase text is a heading."""
+        if not text or len(text) > MAX_HEADING_LENGTH:
+            return False
+        text = fold_diacritics(text)
+        if not HEADING_RE.fullmatch(text):
+            return False
+        sectoare = _sectors(text)
+        puncte_termice = _puncte_termice(text)
+        if sectoare:
+            # Un sector nou începe o secțiune nouă: punctul termic anterior nu se mai aplică
+            self._sector_block = sectoare
+            self._punct_termic_block = puncte_termice
+        elif puncte_termice:
+            self._punct_termic_block = puncte_termice
+        return bool(sectoare or puncte_termice)
+
+
+def _sectors(text: str) -> Tuple[str, ...]:
+    """Return the sectors named in ``text``."""
+    return tuple(sorted({f"sector{sector}" for sector in SECTOR_RE.findall(text)}))
+
+
+def _puncte_termice(text: str) -> Tuple[str, ...]:
+    """Return the thermal points named in ``text``."""
+    return tuple(sorted(set(PUNCT_TERMIC_RE.findall(text))))
+
+
+def parse_page(html: str) -> PageIndex:
+    """Tokenize a whole page at once into indexed interruption records."""
+    parser = PageParser()
+    parser.feed(html)
+    return parser.close()
+
+
+def extract_service_type(text: str) -> Serviciu:
+    """Extract service type from text."""
+    text_lower = text.lower()
+    if 'apă caldă' in text_lower:
+        return Serviciu.APA_CALDA
+    elif 'căldură' in text_lower or 'încălzire' in text_lower:
+        return Serviciu.CALDURA
+    return Serviciu.TERMIC
+
+
+def extract_fields(text: str) -> Dict[str, str]:
+    """Run every rule of ``FIELD_RULES`` over ``text`` in a single pass.
+
+    For each field the first rule that matches anywhere in the text wins,
+    exactly as if the rules were tried one after another with ``re.search``.
+    """
+    best: Dict[str, Tuple[int, str]] = {}
+    for match in _FIELD_SCANNER.finditer(text):
+        group = match.lastgroup
+        field_name, priority, postprocess = _FIELD_GROUPS[group]
+        current = best.get(field_name)
+        if current is None or priority < current[0]:
+            value = match.group(group)
+            best[field_name] = (priority, postprocess(value) if postprocess else value)
+
+    return {
+        field_name: best[field_name][1] if field_name in best else NESPECIFICAT
+        for field_name, _rules, _postprocess in FIELD_RULES
+    }
+
+
+def clean_text(text: str) -> str:
+    """Clean HTML tags and extra spaces from text."""
+    # Etichetele despart celulele: fără spațiu, "Bălcescu</td><td>Întrerupere" s-ar lipi
+    clean = TAG_RE.sub(' ', text)
+    clean = WHITESPACE_RE.sub(' ', clean)
+    return clean.strip()
+
+
+# Tabelul regulilor de extragere: (câmp, reguli în ordinea priorității, postprocesare).
+# Fiecare regulă marchează valoarea extrasă cu grupul numit ``value``.
+FIELD_RULES = (
+    ('cauza', (
+        r'(?i:(?:cauză|motiv)[:\s]*(?P<value>[^\.\n]+))',
+        r'(?i:datorită[\s]*(?P<value>[^\.\n]+))',
+        r'(?i:pentru[\s]*(?P<value>[^\.\n]+))',
+    ), clean_text),
+    ('data_estimata', (
+        r'(?P<value>\d{1,2}[\.\/]\d{1,2}[\.\/]\d{4})',
+        r'(?P<value>\d{1,2}\s+[a-zA-Z]+\s+\d{4})',
+        r'până[\s\S]{1,30}?(?P<value>\d{1,2}[\.\/]\d{1,2})',
+    ), None),
+    ('ora_estimata', (
+        r'(?P<value>\d{1,2}:\d{2})',
+    ), None),
+)
+
+
+def _build_field_scanner() -> Tuple[Pattern, Dict[str, Tuple[str, int, Optional[Callable]]]]:
+    """Compile ``FIELD_RULES`` into one scanner plus its group table.
+
+    Every rule sits inside a lookahead, so matches of different rules may
+    overlap just like independent searches would.
+    """
+    alternatives = []
+    groups = {}
+    for field_name, rules, postprocess in FIELD_RULES:
+        for priority, pattern in enumerate(rules):
+            group = f"{field_name}_{priority}"
+            alternatives.append(pattern.replace('(?P<value>', f'(?P<{group}>'))
+            groups[group] = (field_name, priority, postprocess)
+    return re.compile('(?=' + '|'.join(alternatives) + ')'), groups
+
+
+_FIELD_SCANNER, _FIELD_GROUPS = _build_field_scanner()
@@ -1,163 +1,67 @@
 """Sensors for Termo Bucuresti."""
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.util import dt as dt_util
-from .const import DOMAIN, CONF_STRADA, URL_CMTEB
+from .const import DOMAIN
+from .coordinator import TermoDataUpdateCoordinator, get_streets
+from .entity import TermoStreetEntity
+from .models import SERVICII_APA_CALDA, SERVICII_CALDURA
+from .telemetry import (
+    METRIC_BYTES, METRIC_FETCH_MS, METRIC_FRAGMENTS, METRIC_MATCHES,
+    METRIC_PARSE_MS, METRIC_REFRESH_MS
+)
 
-import asyncio
 import logging
-import re
-from datetime import datetime
-from typing import Dict, List, Any, Optional
 
 _LOGGER = logging.getLogger(__name__)
 
+# Senzorii de diagnostic: (măsurătoare, nume, unitate, clasă de dispozitiv)
+TELEMETRY_SENSORS = (
+    (METRIC_FETCH_MS, "Durată descărcare", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION),
+    (METRIC_BYTES, "Dimensiune pagină", UnitOfInformation.BYTES, SensorDeviceClass.DATA_SIZE),
+    (METRIC_PARSE_MS, "Durată parsare", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION),
+    (METRIC_FRAGMENTS, "Fragmente pagină", None, None),
+    (METRIC_MATCHES, "Întreruperi potrivite", None, None),
+    (METRIC_REFRESH_MS, "Durată actualizare", UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION),
+)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up sensors."""
-    sensors = [
-        TermoApaCaldaSensor(entry),
-        TermoCalduraSensor(entry),
-        TermoStatusGeneralSensor(entry),
-        TermoCauzaSensor(entry),
-        TermoDataEstimataSensor(entry),
-    ]
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    sensors = []
+    for strada in get_streets(entry):
+        sensors.extend([
+            TermoApaCaldaSensor(coordinator, entry, strada),
+            TermoCalduraSensor(coordinator, entry, strada),
+            TermoStatusGeneralSensor(coordinator, entry, strada),
+            TermoCauzaSensor(coordinator, entry, strada),
+            TermoDataEstimataSensor(coordinator, entry, strada),
+            TermoStatisticiSensor(coordinator, entry, strada),
+        ])
+    sensors.extend(
+        TermoTelemetrySensor(coordinator, entry, *description)
+        for description in TELEMETRY_SENSORS
+    )
     
-    async_add_entities(sensors, True)
+    async_add_entities(sensors)
 
-class TermoBaseSensor(SensorEntity):
-    """Base sensor class with advanced parsing."""
-    
-    def __init__(self, entry: ConfigEntry):
-        self._entry = entry
-        self._session = None
-        self._last_update = None
-        self._attr_available = True
-        self._interruption_data = {}
-
-    async def async_update(self):
-        """Update sensor with advanced parsing."""
-        try:
-            if not self._session:
-                self._session = async_get_clientsession(self.hass)
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            async with self._session.get(URL_CMTEB, headers=headers, timeout=30) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    self._interruption_data = await self._parse_interruption_data(html)
-                    await self._update_sensor_state()
-                    self._last_update = dt_util.now()
-                else:
-                    self._attr_available = False
-                    
-        except Exception as e:
-            _LOGGER.error("Eroare la actualizare: %s", e)
-            self._attr_available = False
-
-    async def _parse_interruption_data(self, html: str) -> Dict[str, Any]:
-        """Parse interruption data from CMTEB website with advanced detection."""
-        strada_cautata = self._entry.data[CONF_STRADA].lower()
-        interruptions = []
-        
-        # Modele pentru diferite tipuri de întreruperi
-        patterns = {
-            'zona': r'(?:zona|sector|cartier|strada)[\s\S]{1,100}?' + re.escape(strada_cautata),
-            'serviciu': r'(?:apă caldă|căldură|încălzire|serviciu termic)',
-            'cauza': r'(?:cauză|motiv|datorită)[:\s]*([^\.]+)',
-            'data_estimata': r'(?:estimat|programat|până)[\s\S]{1,50}?\d{1,2}[\.\/]\d{1,2}[\.\/]\d{4}',
-            'ora_estimata': r'(?:ora|la)[\s]*(\d{1,2}:\d{2})'
-        }
-        
-        # Împărțiți HTML-ul în secțiuni care ar putea conține informații despre întreruperi
-        sections = re.split(r'</?div|</?tr|</?p|</?li', html)
-        
-        for section in sections:
-            section_lower = section.lower()
-            
-            # Verificați dacă secțiunea conține numele străzii și cuvintele cheie pentru servicii
-            if (strada_cautata in section_lower and 
-                any(keyword in section_lower for keyword in ['apă', 'caldă', 'căldură', 'termic'])):
-                
-                interruption = {
-                    'strada': self._entry.data[CONF_STRADA],
-                    'serviciu': self._extract_service_type(section),
-                    'cauza': self._extract_cause(section),
-                    'descriere': self._clean_text(section)[:200],
-                    'data_estimata': self._extract_estimated_date(section),
-                    'ora_estimata': self._extract_estimated_time(section),
-                    'detectat_la': dt_util.now().isoformat()
-                }
-                
-                interruptions.append(interruption)
-        
-        return {
-            'interruptions': interruptions,
-            'total_gasite': len(interruptions),
-            'ultima_actualizare': dt_util.now().isoformat()
-        }
+class TermoBaseSensor(TermoStreetEntity, SensorEntity):
+    """Base sensor class fed by the shared coordinator."""
 
-    def _extract_service_type(self, text: str) -> str:
-        """Extract service type from text."""
-        text_lower = text.lower()
-        if 'apă caldă' in text_lower:
-            return "Apă caldă"
-        elif 'căldură' in text_lower or 'încălzire' in text_lower:
-            return "Căldură"
-        return "Serviciu termic"
-
-    def _extract_cause(self, text: str) -> str:
-        """Extract cause from text."""
-        cause_patterns = [
-            r'(?:cauză|motiv)[:\s]*([^\.\n]+)',
-            r'datorită[\s]*([^\.\n]+)',
-            r'pentru[\s]*([^\.\n]+)'
-        ]
-        
-        for pattern in cause_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return self._clean_text(match.group(1))
-        
-        return "Nespecificat"
-
-    def _extract_estimated_date(self, text: str) -> str:
-        """Extract estimated date from text."""
-        date_patterns = [
-            r'(\d{1,2}[\.\/]\d{1,2}[\.\/]\d{4})',
-            r'(\d{1,2}\s+[a-zA-Z]+\s+\d{4})',
-            r'până[\s\S]{1,30}?(\d{1,2}[\.\/]\d{1,2})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                return match.group(1)
-        
-        return "Nespecificat"
-
-    def _extract_estimated_time(self, text: str) -> str:
-        """Extract estimated time from text."""
-        time_pattern = r'(\d{1,2}:\d{2})'
-        match = re.search(time_pattern, text)
-        return match.group(1) if match else "Nespecificat"
+    _state_attribute = "_attr_native_value"
 
-    def _clean_text(self, text: str) -> str:
-        """Clean HTML tags and extra spaces from text."""
-        clean = re.sub(r'<[^>]+>', '', text)
-        clean = re.sub(r'\s+', ' ', clean)
-        return clean.strip()
+    def _update_state(self) -> None:
+        """Update the sensor from the coordinator data."""
+        self._update_sensor_state()
 
-    async def _update_sensor_state(self):
+    def _update_sensor_state(self):
         """Update sensor state based on parsed data."""
         # De implementat by child classes
         pass
@@ -165,30 +69,26 @@ class TermoBaseSensor(SensorEntity):
 class TermoApaCaldaSensor(TermoBaseSensor):
     """Sensor for hot water interruptions."""
     
-    def __init__(self, entry: ConfigEntry):
-        super().__init__(entry)
-        self._attr_name = f"Termo Apă Caldă - {entry.data[CONF_STRADA]}"
-        self._attr_unique_id = f"termo_apa_calda_{entry.entry_id}"
+    def __init__(self, coordinator: TermoDataUpdateCoordinator, entry: ConfigEntry, street: str):
+        super().__init__(coordinator, entry, street)
+        self._attr_name = f"Termo Apă Caldă - {street}"
+        self._attr_unique_id = f"termo_apa_calda_{self._id_suffix}"
         self._attr_icon = "mdi:water-thermometer"
         self._attr_native_value = "Necunoscut"
 
-    async def _update_sensor_state(self):
+    def _update_sensor_state(self):
         """Update hot water sensor state."""
-        interruptions = self._interruption_data.get('interruptions', [])
-        apa_calda_interruptions = [
-            i for i in interruptions 
-            if i['serviciu'] in ['Apă caldă', 'Serviciu termic']
-        ]
+        apa_calda_interruptions = self._interruption_data.for_services(SERVICII_APA_CALDA)
         
         if apa_calda_interruptions:
             self._attr_native_value = "Întrerupt"
             latest = apa_calda_interruptions[0]
             self._attr_extra_state_attributes = {
-                'cauza': latest['cauza'],
-                'descriere': latest['descriere'],
-                'data_estimata': latest['data_estimata'],
-                'ora_estimata': latest['ora_estimata'],
-                'detectat_la': latest['detectat_la'],
+                'cauza': latest.cauza,
+                'descriere': latest.descriere,
+                'data_estimata': latest.data_estimata,
+                'ora_estimata': latest.ora_estimata,
+                'detectat_la': latest.detectat_la.isoformat(),
                 'numar_intreruperi': len(apa_calda_interruptions)
             }
         else:
@@ -200,30 +100,26 @@ class TermoApaCaldaSensor(TermoBaseSensor):
 class TermoCalduraSensor(TermoBaseSensor):
     """Sensor for heating interruptions."""
     
-    def __init__(self, entry: ConfigEntry):
-        super().__init__(entry)
-        self._attr_name = f"Termo Căldură - {entry.data[CONF_STRADA]}"
-        self._attr_unique_id = f"termo_caldura_{entry.entry_id}"
+    def __init__(self, coordinator: TermoDataUpdateCoordinator, entry: ConfigEntry, street: str):
+        super().__init__(coordinator, entry, street)
+        self._attr_name = f"Termo Căldură - {street}"
+        self._attr_unique_id = f"termo_caldura_{self._id_suffix}"
         self._attr_icon = "mdi:radiator"
         self._attr_native_value = "Necunoscut"
 
-    async def _update_sensor_state(self):
+    def _update_sensor_state(self):
         """Update heating sensor state."""
-        interruptions = self._interruption_data.get('interruptions', [])
-        caldura_interruptions = [
-            i for i in interruptions 
-            if i['serviciu'] in ['Căldură', 'Serviciu termic']
-        ]
+        caldura_interruptions = self._interruption_data.for_services(SERVICII_CALDURA)
         
         if caldura_interruptions:
             self._attr_native_value = "Întrerupt"
             latest = caldura_interruptions[0]
             self._attr_extra_state_attributes = {
-                'cauza': latest['cauza'],
-                'descriere': latest['descriere'],
-                'data_estimata': latest['data_estimata'],
-                'ora_estimata': latest['ora_estimata'],
-                'detectat_la': latest['detectat_la'],
+                'cauza': latest.cauza,
+                'descriere': latest.descriere,
+                'data_estimata': latest.data_estimata,
+                'ora_estimata': latest.ora_estimata,
+                'detectat_la': latest.detectat_la.isoformat(),
                 'numar_intreruperi': len(caldura_interruptions)
             }
         else:
@@ -235,16 +131,16 @@ class TermoCalduraSensor(TermoBaseSensor):
 class TermoStatusGeneralSensor(TermoBaseSensor):
     """General status sensor."""
     
-    def __init__(self, entry: ConfigEntry):
-        super().__init__(entry)
-        self._attr_name = f"Termo Status - {entry.data[CONF_STRADA]}"
-        self._attr_unique_id = f"termo_status_{entry.entry_id}"
+    def __init__(self, coordinator: TermoDataUpdateCoordinator, entry: ConfigEntry, street: str):
+        super().__init__(coordinator, entry, street)
+        self._attr_name = f"Termo Status - {street}"
+        self._attr_unique_id = f"termo_status_{self._id_suffix}"
         self._attr_icon = "mdi:home-analytics"
         self._attr_native_value = "Necunoscut"
 
-    async def _update_sensor_state(self):
+    def _update_sensor_state(self):
         """Update general status sensor."""
-        interruptions = self._interruption_data.get('interruptions', [])
+        interruptions = self._interruption_data.interruptions
         
         if interruptions:
             self._attr_native_value = "Întreruperi active"
@@ -256,31 +152,31 @@ class TermoStatusGeneralSensor(TermoBaseSensor):
         self._attr_extra_state_attributes = {
             'total_intreruperi': len(interruptions),
             'ultima_actualizare': self._last_update.isoformat() if self._last_update else None,
-            'strada': self._entry.data[CONF_STRADA]
+            'strada': self._street
         }
 
 class TermoCauzaSensor(TermoBaseSensor):
     """Sensor for interruption cause."""
     
-    def __init__(self, entry: ConfigEntry):
-        super().__init__(entry)
-        self._attr_name = f"Termo Cauză - {entry.data[CONF_STRADA]}"
-        self._attr_unique_id = f"termo_cauza_{entry.entry_id}"
+    def __init__(self, coordinator: TermoDataUpdateCoordinator, entry: ConfigEntry, street: str):
+        super().__init__(coordinator, entry, street)
+        self._attr_name = f"Termo Cauză - {street}"
+        self._attr_unique_id = f"termo_cauza_{self._id_suffix}"
         self._attr_icon = "mdi:alert-circle"
         self._attr_native_value = "Nicio întrerupere"
 
-    async def _update_sensor_state(self):
+    def _update_sensor_state(self):
         """Update cause sensor."""
-        interruptions = self._interruption_data.get('interruptions', [])
+        interruptions = self._interruption_data.interruptions
         
         if interruptions:
             latest = interruptions[0]
-            self._attr_native_value = latest['cauza']
+            self._attr_native_value = latest.cauza
             self._attr_extra_state_attributes = {
-                'descriere_completa': latest['descriere'],
-                'serviciu_afectat': latest['serviciu'],
-                'data_estimata': latest['data_estimata'],
-                'ora_estimata': latest['ora_estimata']
+                'descriere_completa': latest.descriere,
+                'serviciu_afectat': latest.serviciu,
+                'data_estimata': latest.data_estimata,
+                'ora_estimata': latest.ora_estimata
             }
         else:
             self._attr_native_value = "Nicio întrerupere"
@@ -289,25 +185,122 @@ class TermoCauzaSensor(TermoBaseSensor):
 class TermoDataEstimataSensor(TermoBaseSensor):
     """Sensor for estimated restoration time."""
     
-    def __init__(self, entry: ConfigEntry):
-        super().__init__(entry)
-        self._attr_name = f"Termo Data Estimată - {entry.data[CONF_STRADA]}"
-        self._attr_unique_id = f"termo_data_estimata_{entry.entry_id}"
+    def __init__(self, coordinator: TermoDataUpdateCoordinator, entry: ConfigEntry, street: str):
+        super().__init__(coordinator, entry, street)
+        self._attr_name = f"Termo Data Estimată - {street}"
+        self._attr_unique_id = f"termo_data_estimata_{self._id_suffix}"
         self._attr_icon = "mdi:clock-alert"
         self._attr_native_value = "Nespecificat"
 
-    async def _update_sensor_state(self):
+    def _update_sensor_state(self):
         """Update estimated time sensor."""
-        interruptions = self._interruption_data.get('interruptions', [])
+        interruptions = self._interruption_data.interruptions
         
         if interruptions:
             latest = interruptions[0]
-            data_ora = f"{latest['data_estimata']} {latest['ora_estimata']}".strip()
+            data_ora = f"{latest.data_estimata} {latest.ora_estimata}".strip()
             self._attr_native_value = data_ora if data_ora != "Nespecificat" else "În curs"
             self._attr_extra_state_attributes = {
-                'serviciu': latest['serviciu'],
-                'cauza': latest['cauza']
+                'serviciu': latest.serviciu,
+                'cauza': latest.cauza
             }
         else:
             self._attr_native_value = "Nespecificat"
             self._attr_extra_state_attributes = {}
+
+
+class TermoStatisticiSensor(TermoBaseSensor):
+    """Rolling outage statistics of one street.
+
+    The counters are kept up to date by the history as episodes start and
+    end; the sensor only reads them. The state, the number of outages in the
+    last 7 days, is a measurement, so the recorder keeps long-term statistics
+    for it.
+    """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator: TermoDataUpdateCoordinator, entry: ConfigEntry, street: str):
+        super().__init__(coordinator, entry, street)
+        self._attr_name = f"Termo Statistici - {street}"
+        self._attr_unique_id = f"termo_statistici_{self._id_suffix}"
+        self._attr_icon = "mdi:chart-timeline-variant"
+        self._attr_native_unit_of_measurement = "întreruperi"
+        self._attr_native_value = None
+
+    async def async_added_to_hass(self) -> None:
+        """Also follow refreshes that leave the data unchanged, as the windows move."""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_dispatcher_connect(
+            self.hass, self.coordinator.telemetry_signal, self._handle_coordinator_update
+        ))
+
+    def _update_sensor_state(self):
+        """Update the statistics of every window and service."""
+        statistici = self.coordinator.statistics(self._street)
+        self._attr_native_value = statistici['7d']['total']['numar']
+        self._attr_extra_state_attributes = statistici
+
+
+class TermoTelemetrySensor(SensorEntity):
+    """Diagnostic sensor with the rolling distribution of one refresh stage.
+
+    The state is the median over the last refreshes of this entry and the
+    attributes add the spread. The figures for the whole integration are in
+    the diagnostics, so one refresh does not rewrite the sensors of every
+    entry.
+    """
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: TermoDataUpdateCoordinator,
+        entry: ConfigEntry,
+        metric: str,
+        name: str,
+        unit,
+        device_class,
+    ):
+        self.coordinator = coordinator
+        self._metric = metric
+        self._attr_name = f"Termo {name} - {entry.title}"
+        self._attr_unique_id = f"termo_diagnostic_{metric}_{entry.entry_id}"
+        self._attr_icon = "mdi:chart-histogram"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {}
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the telemetry of every refresh of this entry."""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_dispatcher_connect(
+            self.hass, self.coordinator.telemetry_signal, self._handle_telemetry_update
+        ))
+        self._update_from_telemetry()
+
+    @callback
+    def _handle_telemetry_update(self) -> None:
+        """Apply the new samples, writing state only if the summary changed."""
+        previous = (self._attr_native_value, self._attr_extra_state_attributes)
+        self._update_from_telemetry()
+        if (self._attr_native_value, self._attr_extra_state_attributes) != previous:
+            self.async_write_ha_state()
+
+    def _update_from_telemetry(self) -> None:
+        """Read this entry's summary of the metric."""
+        summary = self.coordinator.telemetry.summary(self._metric)
+        self._attr_native_value = summary['p50'] if summary else None
+        attributes = {}
+        if summary:
+            attributes.update({
+                'ultima_valoare': summary['last'],
+                'medie': summary['mean'],
+                'p95': summary['p95'],
+                'maxim': summary['max'],
+                'esantioane': summary['count'],
+            })
+        self._attr_extra_state_attributes = attributes
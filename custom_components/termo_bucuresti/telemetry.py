@@ -0,0 +1,155 @@
+"""Pipeline telemetry for Termo Bucuresti.
+
+Every stage of a refresh (download, parse, street matching, whole refresh)
+adds one sample to a fixed-size rolling window, so the cost is constant per
+refresh and the summaries always describe the latest polls.
+"""
+import math
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+# Numărul de eșantioane păstrate pentru fiecare măsurătoare
+HISTOGRAM_SIZE = 100
+
+# Urmele ultimelor actualizări păstrate pentru diagnosticare și limitele lor
+TRACE_BUFFER_SIZE = 20
+MAX_TRACE_OFFSETS = 50
+MAX_TRACE_ERROR_LENGTH = 200
+TRACE_HASH_LENGTH = 12
+
+TRACE_OK = "ok"
+TRACE_STALE = "stale"
+TRACE_ERROR = "error"
+
+METRIC_FETCH_MS = "fetch_ms"
+METRIC_BYTES = "bytes_received"
+METRIC_PARSE_MS = "parse_ms"
+METRIC_FRAGMENTS = "fragment_count"
+METRIC_MATCHES = "match_count"
+METRIC_REFRESH_MS = "refresh_ms"
+
+METRICS = (
+    METRIC_FETCH_MS, METRIC_BYTES, METRIC_PARSE_MS,
+    METRIC_FRAGMENTS, METRIC_MATCHES, METRIC_REFRESH_MS,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class FetchStats:
+    """Measurements of one download of the CMTEB page."""
+
+    status: int
+    fetch_ms: float
+    bytes_received: int
+    parse_ms: float
+    fragment_count: int
+
+
+@dataclass(frozen=True, slots=True)
+class RefreshTrace:
+    """Compact record of one refresh, kept for diagnostics.
+
+    ``matched_offsets`` are the positions of the matched fragments in the
+    page, so a trace never contains street names or page text.
+    """
+
+    timestamp: float
+    status: str
+    refresh_ms: float
+    new_download: bool = False
+    http_status: Optional[int] = None
+    fetch_ms: Optional[float] = None
+    parse_ms: Optional[float] = None
+    bytes_received: Optional[int] = None
+    fragment_count: Optional[int] = None
+    content_hash: Optional[str] = None
+    matched_offsets: Tuple[int, ...] = ()
+    error: Optional[str] = None
+
+
+def make_trace(
+    timestamp: float,
+    status: str,
+    refresh_ms: float,
+    stats: Optional[FetchStats] = None,
+    new_download: bool = False,
+    content_hash: Optional[str] = None,
+    matched_offsets: Tuple[int, ...] = (),
+    error: Optional[str] = None,
+) -> RefreshTrace:
+    """Build a trace, capping every variable-size field."""
+    return RefreshTrace(
+        timestamp=timestamp,
+        status=status,
+        refresh_ms=round(refresh_ms, 2),
+        new_download=new_download,
+        http_status=stats.status if stats else None,
+        fetch_ms=round(stats.fetch_ms, 2) if stats else None,
+        parse_ms=round(stats.parse_ms, 2) if stats else None,
+        bytes_received=stats.bytes_received if stats else None,
+        fragment_count=stats.fragment_count if stats else None,
+        content_hash=content_hash[:TRACE_HASH_LENGTH] if content_hash else None,
+        matched_offsets=tuple(sorted(matched_offsets))[:MAX_TRACE_OFFSETS],
+        error=error[:MAX_TRACE_ERROR_LENGTH] if error else None,
+    )
+
+
+class RollingHistogram:
+    """Distribution of the last ``size`` samples of one measurement."""
+
+    __slots__ = ('_samples',)
+
+    def __init__(self, size: int = HISTOGRAM_SIZE):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        """Add a sample, dropping the oldest one when the window is full."""
+        self._samples.append(value)
+
+    def summary(self) -> Optional[Dict[str, float]]:
+        """Return count, last value, mean, median, 95th percentile and maximum."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return {
+            'count': len(ordered),
+            'last': round(self._samples[-1], 2),
+            'mean': round(statistics.fmean(ordered), 2),
+            'p50': round(_percentile(ordered, 0.5), 2),
+            'p95': round(_percentile(ordered, 0.95), 2),
+            'max': round(ordered[-1], 2),
+        }
+
+
+class PipelineTelemetry:
+    """Rolling histograms of every refresh stage."""
+
+    def __init__(self, size: int = HISTOGRAM_SIZE):
+        self._histograms = {metric: RollingHistogram(size) for metric in METRICS}
+
+    def record(self, metric: str, value: float) -> None:
+        """Add one sample of ``metric``."""
+        self._histograms[metric].add(value)
+
+    def record_fetch(self, stats: FetchStats) -> None:
+        """Add the samples of one download."""
+        self.record(METRIC_FETCH_MS, stats.fetch_ms)
+        self.record(METRIC_BYTES, stats.bytes_received)
+        self.record(METRIC_PARSE_MS, stats.parse_ms)
+        self.record(METRIC_FRAGMENTS, stats.fragment_count)
+
+    def summary(self, metric: str) -> Optional[Dict[str, float]]:
+        """Return the summary of ``metric``, or ``None`` before its first sample."""
+        return self._histograms[metric].summary()
+
+    def summaries(self) -> Dict[str, Optional[Dict[str, float]]]:
+        """Return the summary of every metric."""
+        return {metric: self.summary(metric) for metric in METRICS}
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    """Return the nearest-rank percentile of an already sorted list."""
+    rank = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[rank]
@@ -0,0 +1,23 @@
+"""Load the Home Assistant independent modules of the integration.
+
+The package ``__init__`` sets up the integration and imports Home Assistant,
+so the scripts register the package directory under a bare name and import
+only the pure modules (parser, matcher, normalize, models, diff, history,
+outage_stats, telemetry). These modules must not import Home Assistant.
+"""
+import importlib
+import sys
+import types
+from pathlib import Path
+
+PACKAGE_NAME = "termo_bucuresti"
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / PACKAGE_NAME
+
+
+def load(module: str):
+    """Import ``module`` from the integration without running its ``__init__``."""
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [str(PACKAGE_DIR)]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.{module}")
@@ -0,0 +1,375 @@
+"""Offline parser benchmark for Termo Bucuresti.
+
+Runs the parse path shared by the sensors and binary sensors (incremental
+parse of the downloaded chunks into a ``PageIndex``, then ``lookup_many`` for
+the configured streets) over the saved pages in ``scripts/corpus`` and over
+synthetic pages scaled up to thousands of rows. Every page is served by a
+local stub HTTP server, so nothing reaches CMTEB.
+
+For each page the report shows the median parse time, the memory blocks
+kept by the index, the peak memory of one parse, the fetch + parse time
+through the stub server and the lookup throughput for 1, 10 and 100
+streets. Parse and lookup times are processor time, which other processes
+do not inflate. Each of their samples is divided by a run of a fixed
+calibration workload made just before it, so the budget in
+``benchmark_budget.json`` holds median ratios that do not depend on the
+speed of the host. The run exits with status 1 when a case's ratio exceeds
+its budget by more than the tolerance.
+
+Usage::
+
+    python scripts/benchmark.py
+    python scripts/benchmark.py --update-budget
+"""
+import argparse
+import codecs
+import gc
+import json
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from _package import load
+
+parser = load("parser")
+matcher = load("matcher")
+normalize = load("normalize")
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+CORPUS_DIR = SCRIPTS_DIR / "corpus"
+BUDGET_FILE = SCRIPTS_DIR / "benchmark_budget.json"
+
+# Aceeași dimensiune a bucăților ca în CmtebClient
+READ_CHUNK_SIZE = 64 * 1024
+
+SYNTHETIC_ROWS = (100, 1000, 5000)
+STREET_COUNTS = (1, 10, 100)
+DEFAULT_REPEATS = 9
+DEFAULT_TOLERANCE = 0.5
+# Diferențele mai mici de atât sunt zgomot de măsurare, nu regresii
+MIN_REGRESSION_MS = 1.0
+# Metricile din buget, păstrate ca raport față de sarcina de calibrare
+BUDGET_METRICS = ("parse_best_ms", f"lookup_{STREET_COUNTS[-1]}_best_ms")
+CALIBRATION_ROWS = 250
+CALIBRATION_SPLIT_RE = re.compile(r"</?td|</?tr")
+CALIBRATION_WORD_RE = re.compile(r"\w+")
+
+PRENUME = (
+    "Ion", "Mihai", "Nicolae", "Ștefan", "Gheorghe", "Alexandru", "Constantin",
+    "Vasile", "Dimitrie", "Matei", "Tudor", "Radu", "Petru", "Grigore", "Emil",
+)
+NUME = (
+    "Creangă", "Eminescu", "Bălcescu", "Basarab", "Viteazu", "Cantemir",
+    "Kogălniceanu", "Iorga", "Enescu", "Rebreanu", "Caragiale", "Sadoveanu",
+)
+PREFIXE = ("Str.", "Strada", "Bd.", "Bulevardul", "Șos.", "Calea", "Aleea")
+CAUZE = (
+    "avarie la rețeaua de distribuție",
+    "lucrări programate de reparații",
+    "defect conductă magistrală",
+    "intervenție la punctul termic",
+)
+SERVICII = ("Întrerupere apă caldă", "Căldură oprită", "Avarie apă caldă și căldură", "Serviciu termic afectat")
+
+
+def street_pool() -> List[str]:
+    """Return the street names used by the synthetic pages, in a fixed order."""
+    return [f"{prenume} {nume}" for nume in NUME for prenume in PRENUME]
+
+
+def synthetic_page(rows: int, seed: int = 0) -> str:
+    """Return a CMTEB-like page with ``rows`` interruption rows."""
+    rng = random.Random(seed)
+    streets = street_pool()
+    parts = ["<html><head><meta charset=\"utf-8\"></head><body><div class=\"content\">"]
+    for row in range(rows):
+        if row % 50 == 0:
+            parts.append(f"<div class=\"sector\"><h2>Sector {row // 50 % 6 + 1}</h2></div><table>")
+        street = rng.choice(streets)
+        if row % 4 == 3:
+            # Rânduri fără întreruperi, eliminate de filtrul de cuvinte cheie
+            parts.append(f"<tr><td>{rng.choice(PREFIXE)} {street}</td><td>Funcționare normală</td></tr>")
+            continue
+        parts.append(
+            f"<tr><td>{rng.choice(PREFIXE)} {street} nr. {rng.randint(1, 200)}</td>"
+            f"<td>{rng.choice(SERVICII)} datorită {rng.choice(CAUZE)}. "
+            f"Termen estimat {rng.randint(1, 28)}.{rng.randint(1, 12)}.2026 "
+            f"ora {rng.randint(0, 23):02d}:{rng.choice((0, 30)):02d}</td></tr>"
+        )
+        if row % 50 == 49:
+            parts.append("</table>")
+    parts.append("</table></div><footer><p>CMTEB</p></footer></body></html>")
+    return "\n".join(parts)
+
+
+def calibration_text() -> str:
+    """Return the fixed input of the calibration workload."""
+    rng = random.Random(1)
+    streets = street_pool()
+    return "".join(
+        f"<tr><td>{rng.choice(PREFIXE)} {rng.choice(streets)}</td>"
+        f"<td>{rng.choice(SERVICII)} datorită {rng.choice(CAUZE)}</td></tr>"
+        for _ in range(CALIBRATION_ROWS)
+    )
+
+
+def calibration_workload(text: str) -> Dict[str, int]:
+    """Split, lower and count words like the parser does, without using it.
+
+    Its time measures the speed of the host, not of the integration, so an
+    optimization of the parser does not move the reference.
+    """
+    counts: Dict[str, int] = {}
+    for part in CALIBRATION_SPLIT_RE.split(text):
+        for word in CALIBRATION_WORD_RE.findall(part.lower()):
+            counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+def load_corpus() -> Dict[str, bytes]:
+    """Return the saved pages followed by the synthetic ones, keyed by name."""
+    pages = {path.name: path.read_bytes() for path in sorted(CORPUS_DIR.glob("*.html"))}
+    for rows in SYNTHETIC_ROWS:
+        pages[f"synthetic_{rows}.html"] = synthetic_page(rows).encode("utf-8")
+    return pages
+
+
+def start_stub_server(pages: Dict[str, bytes]) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve ``pages`` on a local port and return the server and its base URL."""
+
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path.lstrip("/"))
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def parse_html(html: str):
+    """Parse a whole page with cold normalization caches."""
+    normalize.normalize_street.cache_clear()
+    return parser.parse_page(html)
+
+
+def fetch_and_parse(url: str):
+    """Download a page from the stub server, then parse its chunks, as the client does."""
+    normalize.normalize_street.cache_clear()
+    chunks = []
+    with urllib.request.urlopen(url) as response:
+        for chunk in iter(lambda: response.read(READ_CHUNK_SIZE), b""):
+            chunks.append(chunk)
+    page_parser = parser.PageParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        page_parser.feed(decoder.decode(chunk))
+    page_parser.feed(decoder.decode(b"", True))
+    return page_parser.close()
+
+
+def sample(func: Callable[..., object], *args, clock: Callable[[], float] = time.perf_counter) -> float:
+    """Return the time of one call of ``func`` on ``clock``, in milliseconds."""
+    # Ca la timeit, colectorul de gunoi nu rulează în timpul măsurătorii
+    gc.collect()
+    gc.disable()
+    try:
+        start = clock()
+        func(*args)
+        return (clock() - start) * 1000
+    finally:
+        gc.enable()
+
+
+def timings(
+    func: Callable[..., object],
+    repeats: int,
+    setup: Callable[[], object] = None,
+    calibration: Callable[[], object] = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> Tuple[float, float, float]:
+    """Return the median and the best time of ``func`` in milliseconds.
+
+    With ``calibration``, every sample is preceded by one run of it on the
+    same clock, and the median ratio of each sample to the calibration run
+    just before it is returned third (0.0 without it). A slower or busier
+    host lengthens both runs of a pair, so the ratio does not move.
+    """
+    samples, ratios = [], []
+    for _ in range(repeats):
+        args = (setup(),) if setup else ()
+        reference = sample(calibration, clock=clock) if calibration else 0.0
+        samples.append(sample(func, *args, clock=clock))
+        if reference:
+            ratios.append(samples[-1] / reference)
+    ratio = statistics.median(ratios) if ratios else 0.0
+    return statistics.median(samples), min(samples), ratio
+
+
+def ratio_key(metric: str) -> str:
+    """Return the key of the calibrated ratio measured with ``metric``."""
+    return metric.replace("_best_ms", "_ratio")
+
+
+def measure_memory(html: str) -> Tuple[int, int]:
+    """Return the blocks kept by the index and the peak traced memory of one parse."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        index = parse_html(html)
+        after = tracemalloc.take_snapshot()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del index
+    return blocks, peak
+
+
+def run_page(name: str, body: bytes, base_url: str, repeats: int) -> Dict[str, float]:
+    """Benchmark one page and return its measurements."""
+    html = body.decode("utf-8")
+    result = {}
+    text = calibration_text()
+
+    def calibration():
+        return calibration_workload(text)
+
+    # Timpul de procesor al metricilor din buget nu crește când alte procese ocupă sistemul
+    result["parse_ms"], result["parse_best_ms"], result[ratio_key("parse_best_ms")] = timings(
+        lambda: parse_html(html), repeats, calibration=calibration, clock=time.process_time
+    )
+    result["fetch_parse_ms"], _best, _reference = timings(
+        lambda: fetch_and_parse(f"{base_url}/{name}"), repeats
+    )
+    result["blocks"], result["peak_bytes"] = measure_memory(html)
+    result["records"] = len(parse_html(html).records)
+
+    pool = street_pool()
+    for count in STREET_COUNTS:
+        streets = matcher.TrieMatcher(normalize.normalize_street(s) for s in pool[:count])
+        # Fiecare repetiție primește un index nou, ca extragerea câmpurilor să fie măsurată
+        best_key = f"lookup_{count}_best_ms"
+        lookup_ms, result[best_key], result[ratio_key(best_key)] = timings(
+            lambda index: index.lookup_many(streets), repeats,
+            setup=lambda: parse_html(html), calibration=calibration, clock=time.process_time,
+        )
+        result[f"lookup_{count}_ms"] = lookup_ms
+        result[f"streets_{count}_per_s"] = count / (lookup_ms / 1000) if lookup_ms else float("inf")
+    return result
+
+
+def check_budget(results: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    """Return the cases slower than their budget.
+
+    The budget holds the ratio of each metric to the calibration workload;
+    a case fails when its ratio in this run exceeds the budget by more than
+    ``tolerance`` and the difference, in milliseconds, is not just noise.
+    """
+    if not BUDGET_FILE.exists():
+        print(f"Nu există {BUDGET_FILE.name}; rulați cu --update-budget pentru a-l crea")
+        return []
+    budget = json.loads(BUDGET_FILE.read_text(encoding="utf-8"))
+    failures = []
+    for name, limits in budget.items():
+        result = results.get(name, {})
+        for metric in BUDGET_METRICS:
+            limit = limits.get(ratio_key(metric))
+            measured = result.get(metric)
+            ratio = result.get(ratio_key(metric))
+            if not limit or measured is None or not ratio:
+                continue
+            # Bugetul exprimat în milisecunde pe acest sistem, în această rulare
+            baseline = measured * limit / ratio
+            if measured - baseline < MIN_REGRESSION_MS:
+                continue
+            if ratio > limit * (1 + tolerance):
+                failures.append(
+                    f"{name} {metric}: {measured:.2f} ms > {baseline:.2f} ms "
+                    f"(raport {ratio:.2f} > {limit:.2f}, +{tolerance:.0%})"
+                )
+    return failures
+
+
+def write_budget(results: Dict[str, Dict[str, float]]) -> None:
+    """Save the current ratios to the calibration workload as the new budget."""
+    budget = {
+        name: {
+            ratio_key(metric): round(result[ratio_key(metric)], 4)
+            for metric in BUDGET_METRICS if result.get(ratio_key(metric))
+        }
+        for name, result in results.items()
+    }
+    BUDGET_FILE.write_text(json.dumps(budget, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"Bugetul a fost salvat în {BUDGET_FILE}")
+
+
+def print_report(results: Dict[str, Dict[str, float]]) -> None:
+    """Print one line per page."""
+    header = (
+        f"{'pagină':<24}{'rânduri':>8}{'parse ms':>10}{'fetch ms':>10}"
+        f"{'blocuri':>9}{'vârf KiB':>10}"
+        + "".join(f"{f'{n} str/s':>12}" for n in STREET_COUNTS)
+        + f"{'raport':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:<24}{r['records']:>8}{r['parse_ms']:>10.2f}{r['fetch_parse_ms']:>10.2f}"
+            f"{r['blocks']:>9}{r['peak_bytes'] / 1024:>10.1f}"
+            + "".join(f"{r[f'streets_{n}_per_s']:>12.0f}" for n in STREET_COUNTS)
+            + f"{r[ratio_key('parse_best_ms')]:>10.2f}"
+        )
+
+
+def main() -> int:
+    args = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    args.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    args.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                      help="fracția cu care un caz poate depăși bugetul")
+    args.add_argument("--update-budget", action="store_true",
+                      help="salvează rezultatele curente ca buget")
+    options = args.parse_args()
+
+    pages = load_corpus()
+    server, base_url = start_stub_server(pages)
+    try:
+        results = {
+            name: run_page(name, body, base_url, options.repeats)
+            for name, body in pages.items()
+        }
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    if options.update_budget:
+        write_budget(results)
+        return 0
+
+    failures = check_budget(results, options.tolerance)
+    for failure in failures:
+        print(f"REGRESIE: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Backfill the interruption history from archived CMTEB pages.
+
+Parses a directory of saved CMTEB pages with the integration's own parser,
+outside Home Assistant, and replays them in time order into a history file
+in the integration's format. Copy the result to
+``<config>/.storage/termo_bucuresti_history.jsonl`` (with Home Assistant
+stopped) and the 1/7/30-day reports cover the archived period right away.
+
+The pages are replayed into a separate, in-memory history, so episodes
+already in the output file are never touched. Episodes still open on the
+last page end at that page's time, and the finished episodes are then
+appended to the output. Episodes already in the output, with the same id
+and start time, are skipped, so replaying the same or an overlapping
+archive again adds nothing twice. An archived episode whose id is still
+open in the output is skipped too: it cannot be added without ending the
+live one.
+
+Pages are parsed by a process pool. Consecutive identical snapshots are
+recognized by the hash of their bytes and parsed only once per worker, so a
+season of five-minute snapshots takes minutes.
+
+The time of each page comes from a ``YYYYMMDD[-_T]HHMM[SS]`` stamp in its
+file name, or from the file's modification time when the name has none.
+
+Usage::
+
+    python scripts/replay.py ARCHIVE_DIR --strazi "Bd. Unirii, Str. Matei Basarab"
+    python scripts/replay.py ARCHIVE_DIR --strazi "Calea Victoriei" --sector sector1 \\
+        --output termo_bucuresti_history.jsonl
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+from _package import load
+
+history = load("history")
+matcher = load("matcher")
+models = load("models")
+normalize = load("normalize")
+parser = load("parser")
+
+# Ștampila de timp din numele fișierelor arhivate
+STAMP_RE = re.compile(r'(\d{4})(\d{2})(\d{2})[-_T]?(\d{2})(\d{2})(\d{2})?')
+PAGE_SUFFIXES = ('.html', '.htm', '.html.gz', '.htm.gz')
+# Rezultatele paginilor recente păstrate de fiecare proces, după hash
+WORKER_CACHE_SIZE = 64
+CHUNK_SIZE = 32
+
+# (serviciu, cauza, data_estimata, ora_estimata, descriere) pentru fiecare potrivire
+PageMatches = Dict[str, List[Tuple[str, str, str, str, str]]]
+
+_worker: Dict[str, object] = {}
+
+
+def page_time(path: Path) -> float:
+    """Return the UTC timestamp of an archived page."""
+    stamp = STAMP_RE.search(path.name)
+    if stamp:
+        year, month, day, hour, minute, second = stamp.groups()
+        return datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second or 0),
+            tzinfo=timezone.utc,
+        ).timestamp()
+    return path.stat().st_mtime
+
+
+def find_pages(archive: Path) -> List[Tuple[float, Path]]:
+    """Return the archived pages sorted by time."""
+    pages = [
+        path for path in archive.rglob('*')
+        if path.is_file() and path.name.lower().endswith(PAGE_SUFFIXES)
+    ]
+    return sorted((page_time(path), path) for path in pages)
+
+
+def _init_worker(streets: List[str], sector: Optional[str], punct_termic: Optional[str]) -> None:
+    """Prepare the matcher once per process."""
+    _worker['streets'] = streets
+    _worker['matcher'] = matcher.TrieMatcher(normalize.normalize_street(s) for s in streets)
+    _worker['sector'] = sector
+    _worker['punct_termic'] = punct_termic
+    _worker['cache'] = {}
+
+
+def scan_page(path: Path) -> Optional[PageMatches]:
+    """Return the interruptions of every watched street on one page."""
+    try:
+        raw = path.read_bytes()
+        if path.suffix == '.gz':
+            raw = gzip.decompress(raw)
+    except (OSError, EOFError) as e:
+        print(f"Nu se poate citi {path}: {e}", file=sys.stderr)
+        return None
+
+    digest = hashlib.sha256(raw).digest()
+    cache = _worker['cache']
+    if digest in cache:
+        return cache[digest]
+
+    index = parser.parse_page(raw.decode('utf-8', errors='replace'))
+    matches = index.lookup_many(_worker['matcher'], _worker['sector'], _worker['punct_termic'])
+    result = {
+        strada: [
+            (r['serviciu'], r['cauza'], r['data_estimata'], r['ora_estimata'], r['descriere'])
+            for r in matches.get(normalize.normalize_street(strada), ())
+        ]
+        for strada in _worker['streets']
+    }
+
+    if len(cache) >= WORKER_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    cache[digest] = result
+    return result
+
+
+def interruptions_of(strada: str, found, moment: float) -> List[object]:
+    """Build the ``Interruption`` objects of one street, as the coordinator does."""
+    detectat_la = datetime.fromtimestamp(moment, timezone.utc)
+    ids = models.interruption_ids(strada, ((serviciu, cauza) for serviciu, cauza, *_ in found))
+    return [
+        models.Interruption(
+            id=ep_id,
+            strada=strada,
+            serviciu=models.Serviciu(serviciu),
+            cauza=cauza,
+            descriere=descriere,
+            data_estimata=data_estimata,
+            ora_estimata=ora_estimata,
+            detectat_la=detectat_la,
+        )
+        for ep_id, (serviciu, cauza, data_estimata, ora_estimata, descriere) in zip(ids, found)
+    ]
+
+
+def append_episodes(store, replayed) -> Tuple[int, int, int]:
+    """Add the finished replayed episodes to ``store``.
+
+    Returns the number of episodes added, of those already in ``store`` and
+    of those whose id is still open there.
+    """
+    # Aceeași arhivă rulată din nou produce aceleași episoade, cu același început
+    known = {(episode['id'], episode['inceput']) for episode in store.episodes()}
+    added = duplicates = conflicts = 0
+    for episode in replayed.episodes():
+        if (episode['id'], episode['inceput']) in known:
+            duplicates += 1
+            continue
+        if store.is_open(episode['id']):
+            conflicts += 1
+            continue
+        store.record_start(episode['id'], SimpleNamespace(**episode), episode['inceput'])
+        store.record_end(episode['id'], episode['sfarsit'])
+        added += 1
+    return added, duplicates, conflicts
+
+
+def main() -> int:
+    args = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    args.add_argument("archive", type=Path, help="directorul cu paginile CMTEB salvate")
+    args.add_argument("--strazi", required=True,
+                      help="străzile monitorizate, separate prin virgulă sau punct și virgulă")
+    args.add_argument("--sector", help="de exemplu sector3")
+    args.add_argument("--punct-termic", help="de exemplu centru")
+    args.add_argument("--output", type=Path, default=Path(history.HISTORY_FILE),
+                      help="fișierul de istoric; dacă există, episoadele noi se adaugă la el")
+    args.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    options = args.parse_args()
+
+    streets = list(dict.fromkeys(
+        s.strip() for s in re.split(r'[,;\n]', options.strazi) if s.strip()
+    ))
+    if not streets:
+        args.error("cel puțin o stradă este necesară")
+
+    pages = find_pages(options.archive)
+    if not pages:
+        print(f"Nicio pagină găsită în {options.archive}", file=sys.stderr)
+        return 1
+
+    # Istoricul existent nu participă la reconstituire, ca episoadele lui să rămână neatinse
+    replayed = history.HistoryStore(os.devnull)
+    last_moment = None
+
+    begin = time.perf_counter()
+    skipped = 0
+    with ProcessPoolExecutor(
+        max_workers=options.workers,
+        initializer=_init_worker,
+        initargs=(streets, options.sector, options.punct_termic),
+    ) as pool:
+        # Rezultatele vin în ordinea paginilor, deci episoadele se reconstituie cronologic
+        results = pool.map(scan_page, [path for _moment, path in pages], chunksize=CHUNK_SIZE)
+        for (moment, _path), matches in zip(pages, results):
+            if matches is None:
+                skipped += 1
+                continue
+            for strada in streets:
+                replayed.sync_street(strada, interruptions_of(strada, matches[strada], moment), moment)
+            last_moment = moment
+
+    if last_moment is not None:
+        # Episoadele încă deschise pe ultima pagină se încheie la momentul ei
+        for strada in streets:
+            replayed.sync_street(strada, (), last_moment)
+
+    store = history.HistoryStore(str(options.output))
+    store.load()
+    added, duplicates, conflicts = append_episodes(store, replayed)
+    store.flush()
+
+    print(
+        f"{len(pages) - skipped} pagini procesate ({skipped} omise) în "
+        f"{time.perf_counter() - begin:.1f} s; {added} episoade noi în {options.output}, "
+        f"{duplicates} existau deja"
+    )
+    if conflicts:
+        print(f"{conflicts} episoade omise: sunt încă deschise în {options.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Test configuration for Termo Bucuresti."""
+import sys
+from pathlib import Path
+
+# Integrarea se importă ca în Home Assistant, din directorul custom_components
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
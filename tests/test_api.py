@@ -0,0 +1,186 @@
+"""Tests of the CMTEB fetch layer against a local stub HTTP server."""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import List
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from custom_components.termo_bucuresti import api
+from custom_components.termo_bucuresti.api import CircuitBreaker, CmtebClient, CmtebError
+
+PAGE = (
+    "<html><body><div class=\"content\">"
+    "<div><h2>Sector 1</h2></div><table>"
+    "<tr><td>Str. Matei Basarab</td><td>Întrerupere apă caldă datorită avariei.</td></tr>"
+    "</table></div><footer>CMTEB</footer></body></html>"
+).encode("utf-8")
+
+
+class StubServer:
+    """Answer each request with the next scripted status, then with the last one."""
+
+    def __init__(self, statuses: List[int]):
+        self.statuses = list(statuses)
+        self.requests = 0
+        self.url = ""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        if status != 200:
+            return web.Response(status=status)
+        return web.Response(body=PAGE, content_type="text/html", charset="utf-8")
+
+
+@asynccontextmanager
+async def stub_client(statuses: List[int], breaker: CircuitBreaker = None):
+    """Start a stub server and yield it with a client that talks to it."""
+    server = StubServer(statuses)
+    app = web.Application()
+    app.router.add_get("/", server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    server.url = f"http://127.0.0.1:{runner.addresses[0][1]}/"
+    try:
+        async with aiohttp.ClientSession() as session:
+            yield server, CmtebClient(None, session, breaker=breaker)
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Retry at once instead of waiting for the backoff."""
+    monkeypatch.setattr(api, "FETCH_BACKOFF_BASE", 0)
+
+
+@pytest.mark.parametrize("status", [500, 503, 429])
+def test_transient_errors_are_retried(status):
+    async def scenario():
+        async with stub_client([status, status, 200]) as (server, client):
+            index = await client.async_get_index(server.url)
+            assert server.requests == 3
+            assert index.records
+            assert index.stats.status == 200
+            assert not client.is_stale(server.url)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_client_errors_fail_without_retry(status):
+    async def scenario():
+        async with stub_client([status]) as (server, client):
+            with pytest.raises(CmtebError) as error:
+                await client.async_get_index(server.url)
+            assert not error.value.retryable
+            assert server.requests == 1
+
+    asyncio.run(scenario())
+
+
+def test_retries_are_bounded():
+    async def scenario():
+        async with stub_client([500]) as (server, client):
+            with pytest.raises(CmtebError):
+                await client.async_get_index(server.url)
+            assert server.requests == api.FETCH_RETRIES
+
+    asyncio.run(scenario())
+
+
+def test_breaker_opens_after_repeated_failures(monkeypatch):
+    monkeypatch.setattr(api, "FETCH_RETRIES", 1)
+
+    async def scenario():
+        breaker = CircuitBreaker(threshold=2, cooldown=60, max_cooldown=60)
+        async with stub_client([500], breaker) as (server, client):
+            for _ in range(2):
+                with pytest.raises(CmtebError):
+                    await client.async_get_index(server.url, force=True)
+            assert breaker.is_open
+
+            # Cât timp întrerupătorul este deschis, CMTEB nu mai este contactat
+            with pytest.raises(CmtebError):
+                await client.async_get_index(server.url, force=True)
+            assert server.requests == 2
+
+    asyncio.run(scenario())
+
+
+def test_breaker_lets_one_trial_through_after_cooldown(monkeypatch):
+    monkeypatch.setattr(api, "FETCH_RETRIES", 1)
+
+    async def scenario():
+        breaker = CircuitBreaker(threshold=1, cooldown=0.1, max_cooldown=1)
+        async with stub_client([500, 500, 200], breaker) as (server, client):
+            with pytest.raises(CmtebError):
+                await client.async_get_index(server.url, force=True)
+            assert breaker.is_open
+
+            # Încercarea de după pauză eșuează: întrerupătorul se redeschide pentru mai mult timp
+            await asyncio.sleep(0.12)
+            with pytest.raises(CmtebError):
+                await client.async_get_index(server.url, force=True)
+            assert server.requests == 2
+            await asyncio.sleep(0.1)
+            assert breaker.is_open
+
+            # Încercarea reușită închide întrerupătorul
+            await asyncio.sleep(0.15)
+            index = await client.async_get_index(server.url, force=True)
+            assert index.records
+            assert server.requests == 3
+            assert not breaker.is_open
+
+    asyncio.run(scenario())
+
+
+def test_last_good_page_is_served_while_down():
+    async def scenario():
+        async with stub_client([200, 500, 500, 500, 200]) as (server, client):
+            first = await client.async_get_index(server.url)
+            assert not client.is_stale(server.url)
+
+            stale = await client.async_get_index(server.url, force=True)
+            assert stale is first
+            assert client.is_stale(server.url)
+
+            fresh = await client.async_get_index(server.url, force=True)
+            assert fresh.records
+            assert not client.is_stale(server.url)
+
+    asyncio.run(scenario())
+
+
+def test_last_good_page_is_served_while_breaker_is_open(monkeypatch):
+    monkeypatch.setattr(api, "FETCH_RETRIES", 1)
+
+    async def scenario():
+        breaker = CircuitBreaker(threshold=1, cooldown=60, max_cooldown=60)
+        async with stub_client([200, 500], breaker) as (server, client):
+            first = await client.async_get_index(server.url)
+            assert await client.async_get_index(server.url, force=True) is first
+            assert breaker.is_open
+
+            assert await client.async_get_index(server.url, force=True) is first
+            assert client.is_stale(server.url)
+            assert server.requests == 2
+
+    asyncio.run(scenario())
+
+
+def test_old_page_is_not_served():
+    async def scenario():
+        async with stub_client([200, 500]) as (server, client):
+            index = await client.async_get_index(server.url)
+            index.fetched_at = time.time() - api.STALE_MAX_AGE - 1
+            with pytest.raises(CmtebError):
+                await client.async_get_index(server.url, force=True)
+
+    asyncio.run(scenario())